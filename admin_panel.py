@@ -1,8 +1,10 @@
 import streamlit as st
 import sqlite3
 import hashlib
-from datetime import datetime, timedelta
 from auth_utils import require_auth, log_user_action, get_user_info, is_admin
+from database import query_all, execute, transaction
+from session_cache import session_cache
+from status_snapshot import get_status_snapshot
 
 # Require authentication and admin privileges
 require_auth()
@@ -55,112 +57,70 @@ st.markdown("""
 
 def get_system_stats():
     """Get system statistics"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    # User statistics
-    cursor.execute("SELECT COUNT(*) FROM users")
-    total_users = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
-    admin_users = cursor.fetchone()[0]
-    
-    # Session statistics
-    cursor.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (datetime.now(),))
-    active_sessions = cursor.fetchone()[0]
-    
-    # Audit log statistics
-    cursor.execute("SELECT COUNT(*) FROM audit_log")
-    total_audit_entries = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM audit_log WHERE timestamp > ?", 
-                  (datetime.now() - timedelta(hours=24),))
-    recent_audit_entries = cursor.fetchone()[0]
-    
-    conn.close()
+    # Counters kept in memory by the status snapshot service
+    snapshot = get_status_snapshot().get()
     
     return {
-        'total_users': total_users,
-        'admin_users': admin_users,
-        'active_sessions': active_sessions,
-        'total_audit_entries': total_audit_entries,
-        'recent_audit_entries': recent_audit_entries
+        'total_users': snapshot['total_users'],
+        'admin_users': snapshot['admin_users'],
+        'active_sessions': snapshot['active_sessions'],
+        'total_audit_entries': snapshot['total_audit_entries'],
+        'recent_audit_entries': snapshot['recent_audit_entries'],
+        'session_cache': session_cache.stats()
     }
 
 def get_all_users():
     """Get all users from database"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    return query_all("""
         SELECT id, username, role, created_at 
         FROM users 
         ORDER BY created_at DESC
     """)
-    
-    users = cursor.fetchall()
-    conn.close()
-    
-    return users
 
 def get_recent_audit_logs(limit=50):
     """Get recent audit log entries"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute("""
+    return query_all("""
         SELECT al.timestamp, u.username, al.action, al.ip_address
         FROM audit_log al
         LEFT JOIN users u ON al.user_id = u.id
         ORDER BY al.timestamp DESC
         LIMIT ?
     """, (limit,))
-    
-    logs = cursor.fetchall()
-    conn.close()
-    
-    return logs
 
 def add_user(username, password, role):
     """Add a new user"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
     try:
         password_hash = hashlib.sha256(password.encode()).hexdigest()
-        cursor.execute('''
+        execute('''
             INSERT INTO users (username, password_hash, role)
             VALUES (?, ?, ?)
         ''', (username, password_hash, role))
+        # Show the new user in the counts right away
+        get_status_snapshot().refresh()
         
-        conn.commit()
-        conn.close()
         return True, "User added successfully!"
     except sqlite3.IntegrityError:
-        conn.close()
         return False, "Username already exists!"
     except Exception as e:
-        conn.close()
         return False, f"Error adding user: {str(e)}"
 
 def delete_user(user_id):
     """Delete a user"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
     try:
-        # Delete user's sessions first
-        cursor.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
-        # Delete user's audit logs
-        cursor.execute("DELETE FROM audit_log WHERE user_id = ?", (user_id,))
-        # Delete user
-        cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        with transaction() as cursor:
+            # Delete user's sessions first
+            cursor.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,))
+            # Delete user's audit logs
+            cursor.execute("DELETE FROM audit_log WHERE user_id = ?", (user_id,))
+            # Delete user
+            cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
+        # Deleted sessions must not stay valid through the cache
+        session_cache.invalidate_user(user_id)
+        # Deleted audit entries are only picked up by a full recount
+        get_status_snapshot().refresh(full=True)
         
-        conn.commit()
-        conn.close()
         return True, "User deleted successfully!"
     except Exception as e:
-        conn.close()
         return False, f"Error deleting user: {str(e)}"
 
 def main():
@@ -198,6 +158,7 @@ def main():
             <div class="stats-card">
                 <h3>🔐 Sessions</h3>
                 <p><strong>Active:</strong> {stats['active_sessions']}</p>
+                <p><strong>Cache Hit Rate:</strong> {stats['session_cache']['hit_rate']:.0%}</p>
                 <p><strong>Status:</strong> 🟢 Normal</p>
             </div>
             """, unsafe_allow_html=True)
@@ -0,0 +1,155 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from database import transaction
+
+# Rows carry their own timestamp so batching does not shift event times
+# (UTC, same format as the table's CURRENT_TIMESTAMP default)
+INSERT_AUDIT_EVENT = '''
+    INSERT INTO audit_log (user_id, action, ip_address, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Queue sentinel that tells the writer thread to finish
+_STOP = object()
+
+class AuditWriter(threading.Thread):
+    """
+    Background writer for audit_log and detections
+    Events are queued without touching the disk and inserted in batches, one
+    transaction every flush_interval seconds or batch_size rows, whichever comes first.
+    When the queue is full new events are dropped and counted instead of blocking the caller
+    """
+
+    def __init__(self, max_queue=10000, batch_size=200, flush_interval=0.25):
+        super().__init__(daemon=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+
+    def enqueue(self, sql, params):
+        """Queue one INSERT; returns False if it was dropped because the queue is full"""
+        try:
+            self._queue.put_nowait((sql, params))
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+    def log(self, user_id, action, ip_address="unknown"):
+        """Queue an audit event; returns False if it was dropped because the queue is full"""
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        return self.enqueue(INSERT_AUDIT_EVENT, (user_id, action, ip_address, timestamp))
+
+    def _collect(self):
+        """
+        Wait for events and gather one batch
+        Returns (rows, flush events to signal, whether to stop)
+        """
+        rows = []
+        waiters = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                return rows, waiters, True
+            if isinstance(item, threading.Event):
+                # Flush request: write what we have right away
+                waiters.append(item)
+                return rows, waiters, False
+            rows.append(item)
+            if len(rows) >= self.batch_size:
+                return rows, waiters, False
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return rows, waiters, False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return rows, waiters, False
+
+    def _write(self, rows):
+        """Insert one batch in a single transaction, one executemany per statement"""
+        statements = {}
+        for sql, params in rows:
+            statements.setdefault(sql, []).append(params)
+        try:
+            with transaction() as cursor:
+                for sql, params in statements.items():
+                    cursor.executemany(sql, params)
+            with self._stats_lock:
+                self.written += len(rows)
+                self.batches += 1
+        except Exception as e:
+            print(f"Error writing audit log batch: {e}")
+            with self._stats_lock:
+                self.errors += 1
+                self.dropped += len(rows)
+
+    def run(self):
+        while True:
+            rows, waiters, stop = self._collect()
+            if rows:
+                self._write(rows)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                break
+
+    def flush(self, timeout=5.0):
+        """Wait until every event queued so far has been written"""
+        if not self.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write the remaining events and stop the writer thread"""
+        if not self.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            print("Audit log queue still full at shutdown; pending events are lost")
+            return
+        self.join(timeout)
+
+    def stats(self):
+        """Queue depth plus events written, dropped, batches and write errors so far"""
+        with self._stats_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'errors': self.errors
+            }
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_audit_writer():
+    """Return the process-wide audit writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = AuditWriter()
+                writer.start()
+                # Flush pending events when the app shuts down
+                atexit.register(writer.close)
+                _writer = writer
+    return _writer
@@ -1,6 +1,7 @@
 import streamlit as st
-import sqlite3
-from datetime import datetime
+from database import execute
+from audit_writer import get_audit_writer
+from session_cache import session_cache, validate_session
 import secrets
 
 def check_authentication():
@@ -17,18 +18,8 @@ def verify_session():
     if not st.session_state.get('session_token'):
         return False
     
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT s.id, s.expires_at, u.username, u.role 
-        FROM sessions s 
-        JOIN users u ON s.user_id = u.id 
-        WHERE s.session_token = ? AND s.expires_at > ?
-    ''', (st.session_state.session_token, datetime.now()))
-    
-    session = cursor.fetchone()
-    conn.close()
+    # Cached for a short TTL so reruns don't hit the database every time
+    session = validate_session(st.session_state.session_token)
     
     if session:
         return True
@@ -51,29 +42,16 @@ def require_auth():
 def log_user_action(action):
     """Log user actions for audit trail"""
     if st.session_state.get('user_id'):
-        conn = sqlite3.connect('admin_auth.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO audit_log (user_id, action, ip_address)
-            VALUES (?, ?, ?)
-        ''', (st.session_state.user_id, action, "web"))
-        
-        conn.commit()
-        conn.close()
+        # Queued and written in batches by a background thread so the frame loop never waits on disk
+        get_audit_writer().log(st.session_state.user_id, action, "web")
 
 def logout():
     """Logout user and clear session"""
     if st.session_state.get('session_token'):
         # Remove session from database
-        conn = sqlite3.connect('admin_auth.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM sessions WHERE session_token = ?', 
-                      (st.session_state.session_token,))
-        
-        conn.commit()
-        conn.close()
+        execute('DELETE FROM sessions WHERE session_token = ?', 
+                (st.session_state.session_token,))
+        session_cache.invalidate(st.session_state.session_token)
         
         # Log logout action
         log_user_action("logout")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for admin_auth.db queries
+Fills a scratch database with synthetic audit_log/sessions rows and measures the
+dashboard and chatbot queries before and after the index migration, and
+historical charts from raw detections against the rollup tables.
+
+Usage: python benchmark_database.py [rows ...]   (default: 1000000)
+"""
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+import database
+from detection_log import DETECTORS, INSERT_DETECTION, alert_timeline
+
+ALERT_ACTIONS = ['fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected']
+OTHER_ACTIONS = ['dashboard_accessed', 'login', 'logout', 'start_monitoring', 'stop_monitoring']
+
+# Queries issued by the chatbot, admin panel and session checks
+QUERIES = {
+    'alert counts (24h)': ("""
+        SELECT action, COUNT(*) as count
+        FROM audit_log
+        WHERE timestamp > ?
+        AND action IN ('fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected')
+        GROUP BY action
+    """, lambda now: (now - timedelta(hours=24),)),
+    'alert history (24h)': ("""
+        SELECT action, timestamp
+        FROM audit_log
+        WHERE timestamp > ?
+        AND action IN ('fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected')
+        ORDER BY timestamp DESC
+    """, lambda now: (now - timedelta(hours=24),)),
+    'recent audit entries (24h)': ("SELECT COUNT(*) FROM audit_log WHERE timestamp > ?",
+                                   lambda now: (now - timedelta(hours=24),)),
+    'latest 50 audit logs': ("""
+        SELECT al.timestamp, u.username, al.action, al.ip_address
+        FROM audit_log al
+        LEFT JOIN users u ON al.user_id = u.id
+        ORDER BY al.timestamp DESC
+        LIMIT ?
+    """, lambda now: (50,)),
+    'active sessions': ("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", lambda now: (now,))
+}
+
+def populate(rows, days=30, sessions=None, seed=0):
+    """Insert synthetic audit_log rows spread over the last days, and expired/active sessions"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    span = days * 24 * 3600
+
+    def audit_rows():
+        for _ in range(rows):
+            # Mostly alerts, as under continuous monitoring
+            action = rng.choice(ALERT_ACTIONS) if rng.random() < 0.8 else rng.choice(OTHER_ACTIONS)
+            timestamp = now - timedelta(seconds=rng.random() * span)
+            yield (1, action, timestamp.strftime('%Y-%m-%d %H:%M:%S'), "web")
+
+    database.execute_many("INSERT INTO audit_log (user_id, action, timestamp, ip_address) VALUES (?, ?, ?, ?)",
+                          audit_rows())
+
+    sessions = sessions or max(1000, rows // 100)
+    database.execute_many("INSERT INTO sessions (user_id, session_token, expires_at) VALUES (?, ?, ?)",
+                          ((1, f"token-{i}", now + timedelta(hours=rng.uniform(-24 * days, 8))) for i in range(sessions)))
+
+def time_queries(iterations=5):
+    """Average milliseconds per query"""
+    now = datetime.now()
+    timings = {}
+    for name, (sql, params) in QUERIES.items():
+        database.query_all(sql, params(now))  # warm-up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            database.query_all(sql, params(now))
+        timings[name] = (time.perf_counter() - start) / iterations * 1000
+    return timings
+
+def time_call(func, iterations):
+    """Average milliseconds per call of func"""
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+def benchmark_indexes(rows):
+    """Compare query latency on the unindexed schema (v1) and after all migrations"""
+    print(f"🗄️ Benchmarking {rows:,} audit_log rows...")
+
+    workdir = tempfile.mkdtemp()
+    original_path = database.DB_PATH
+    database.DB_PATH = os.path.join(workdir, "benchmark.db")
+    try:
+        database.migrate(target=1)
+        start = time.perf_counter()
+        populate(rows)
+        print(f"   Populated in {time.perf_counter() - start:.1f} s")
+
+        before = time_queries()
+
+        start = time.perf_counter()
+        database.migrate()
+        print(f"   Migrated to v{database.schema_version()} in {time.perf_counter() - start:.1f} s")
+
+        after = time_queries()
+
+        for name in QUERIES:
+            print(f"   {name}: {before[name]:.2f} ms -> {after[name]:.2f} ms ({before[name] / after[name]:.1f}x)")
+        return before, after
+    finally:
+        database.close_connections()
+        database.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def populate_detections(rows, days=30, cameras=4, seed=0):
+    """Insert synthetic detections spread over the last days (the rollup trigger runs for each row)"""
+    rng = random.Random(seed)
+    now = time.time()
+    span = days * 24 * 3600
+    database.execute_many(INSERT_DETECTION, ((rng.randrange(cameras), rng.choice(DETECTORS), int(now - rng.random() * span),
+                                              None, None, None, None, None, None, None) for _ in range(rows)))
+
+def raw_timeline(since, resolution):
+    """Bucketed detection counts computed from the raw detections table"""
+    return database.query_all('''
+        SELECT detected_at - detected_at % ? AS bucket, detector, COUNT(*)
+        FROM detections
+        WHERE detected_at >= ?
+        GROUP BY bucket, detector
+    ''', (resolution, int(since)))
+
+def benchmark_rollups(rows, iterations=5):
+    """Compare historical charts from raw detections against the rollup tables"""
+    print(f"📈 Benchmarking rollups over {rows:,} detections...")
+
+    workdir = tempfile.mkdtemp()
+    original_path = database.DB_PATH
+    database.DB_PATH = os.path.join(workdir, "benchmark.db")
+    try:
+        database.migrate()
+        start = time.perf_counter()
+        populate_detections(rows)
+        print(f"   Populated in {time.perf_counter() - start:.1f} s (rollups maintained on insert)")
+
+        now = time.time()
+        for label, seconds in (("day", 86400), ("week", 7 * 86400), ("month", 30 * 86400)):
+            resolution, timeline = alert_timeline(now - seconds, now)
+            rollup_time = time_call(lambda: alert_timeline(now - seconds, now), iterations)
+            raw_time = time_call(lambda: raw_timeline(now - seconds, resolution), iterations)
+            print(f"   {label} ({len(timeline)} buckets of {resolution} s): raw {raw_time:.2f} ms, "
+                  f"rollup {rollup_time:.2f} ms ({raw_time / rollup_time:.1f}x)")
+    finally:
+        database.close_connections()
+        database.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    """Run the database benchmarks"""
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000000]
+
+    print("=" * 50)
+    print("⏱️ Admin Database Benchmark")
+    print("=" * 50)
+
+    for rows in sizes:
+        benchmark_indexes(rows)
+        print()
+        benchmark_rollups(rows)
+        print()
+
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for AI Event Monitoring Models
+Measures detection throughput on synthetic frames so optimisations can be compared.
+"""
+
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from models.fire_smoke import check_fire_smoke
+from models.crowd_surge import check_crowd_surge, count_people_per_cell
+from models.unconscious import check_unconscious
+from models.detection import detect_people, detect_people_batch, load_model, PersonDetections
+from pipeline.multi_camera import MultiCameraEngine
+from pipeline.process_pool import ProcessDetectionBackend
+
+def make_test_frame(width=640, height=480, seed=0):
+    """Create a synthetic frame with a few person-sized shapes"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+    for i in range(4):
+        x = 60 + i * 140
+        cv2.rectangle(frame, (x, 150), (x + 50, 330), (0, 255, 0), -1)
+    cv2.rectangle(frame, (200, 380), (400, 430), (0, 255, 0), -1)
+    return frame
+
+def time_it(func, iterations):
+    """Return average seconds per call of func over the given iterations"""
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+def benchmark_shared_inference(iterations=20):
+    """Compare one YOLO pass per detector against one shared pass per frame"""
+    print("🧠 Benchmarking shared YOLO inference...")
+
+    if not load_model():
+        print("   ❌ Could not load YOLO model")
+        return None
+
+    frame = make_test_frame()
+
+    def separate():
+        check_crowd_surge(frame)
+        check_unconscious(frame)
+
+    def shared():
+        detections = detect_people(frame)
+        check_crowd_surge(frame, detections)
+        check_unconscious(frame, detections)
+
+    separate_time = time_it(separate, iterations)
+    shared_time = time_it(shared, iterations)
+
+    print(f"   Separate passes: {separate_time * 1000:.1f} ms/frame ({1 / separate_time:.1f} FPS)")
+    print(f"   Shared pass:     {shared_time * 1000:.1f} ms/frame ({1 / shared_time:.1f} FPS)")
+    print(f"   Speedup: {separate_time / shared_time:.2f}x")
+    return separate_time / shared_time
+
+def benchmark_batched_cameras(camera_counts=(1, 4, 8), iterations=10):
+    """Compare one YOLO call per camera against one batched call for all cameras"""
+    print("📷 Benchmarking batched multi-camera inference...")
+
+    if not load_model():
+        print("   ❌ Could not load YOLO model")
+        return None
+
+    speedups = {}
+    for cameras in camera_counts:
+        frames = [make_test_frame(seed=i) for i in range(cameras)]
+
+        def serial():
+            for frame in frames:
+                detect_people(frame)
+
+        def batched():
+            detect_people_batch(frames)
+
+        serial_time = time_it(serial, iterations)
+        batched_time = time_it(batched, iterations)
+        speedups[cameras] = serial_time / batched_time
+
+        print(f"   {cameras} camera(s): serial {serial_time * 1000:.1f} ms, "
+              f"batched {batched_time * 1000:.1f} ms "
+              f"({cameras / batched_time:.1f} camera-frames/s, {speedups[cameras]:.2f}x)")
+    return speedups
+
+def make_dense_detections(count=250, width=1920, height=1080, seed=0):
+    """Create synthetic person boxes for a dense crowd scene"""
+    rng = np.random.default_rng(seed)
+    x1 = rng.uniform(0, width - 60, count)
+    y1 = rng.uniform(0, height - 150, count)
+    boxes = np.stack([x1, y1, x1 + 60, y1 + 150], axis=1).astype(np.float32)
+    return PersonDetections(boxes, np.ones(count, dtype=np.float32), (height, width, 3))
+
+def loop_crowd_grid(detections, frame_shape, rows, cols):
+    """Per-box Python loop that check_crowd_surge used before vectorization"""
+    height, width = frame_shape[:2]
+    segment_counts = [[0 for _ in range(cols)] for _ in range(rows)]
+    for box in detections.boxes:
+        xyxy = box.astype(int)
+        cx = int((xyxy[0] + xyxy[2]) / 2)
+        cy = int((xyxy[1] + xyxy[3]) / 2)
+        row = min(rows - 1, cy * rows // height)
+        col = min(cols - 1, cx * cols // width)
+        segment_counts[row][col] += 1
+    return segment_counts
+
+def benchmark_crowd_grid(box_counts=(50, 250, 1000), rows=3, cols=3, iterations=2000):
+    """Compare the per-box grid loop against the vectorized bincount version"""
+    print("🧮 Benchmarking crowd grid post-processing...")
+
+    speedups = {}
+    for count in box_counts:
+        detections = make_dense_detections(count)
+        shape = detections.frame_shape
+
+        expected = np.array(loop_crowd_grid(detections, shape, rows, cols))
+        if not (expected == count_people_per_cell(detections, shape, rows, cols)).all():
+            print(f"   ❌ Grid counts differ for {count} boxes")
+            return None
+
+        loop_time = time_it(lambda: loop_crowd_grid(detections, shape, rows, cols), iterations)
+        vector_time = time_it(lambda: count_people_per_cell(detections, shape, rows, cols), iterations)
+        speedups[count] = loop_time / vector_time
+
+        print(f"   {count} boxes: loop {loop_time * 1e6:.1f} µs, "
+              f"vectorized {vector_time * 1e6:.1f} µs ({speedups[count]:.1f}x)")
+    return speedups
+
+def benchmark_backends(camera_counts=(1, 4, 8), iterations=10):
+    """Compare the thread backend against the process-pool backend"""
+    print("🧵 Benchmarking thread vs process detection backends...")
+
+    if not load_model():
+        print("   ❌ Could not load YOLO model")
+        return None
+
+    speedups = {}
+    for cameras in camera_counts:
+        frames = {camera: make_test_frame(seed=camera) for camera in range(cameras)}
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            thread_engine = MultiCameraEngine([], executor=executor)
+            thread_time = time_it(lambda: thread_engine.process(frames), iterations)
+
+        process_engine = MultiCameraEngine([], backend=ProcessDetectionBackend(cameras))
+        try:
+            process_time = time_it(lambda: process_engine.process(frames), iterations)
+        finally:
+            process_engine.release()
+        speedups[cameras] = thread_time / process_time
+
+        print(f"   {cameras} camera(s): threads {thread_time * 1000:.1f} ms, "
+              f"processes {process_time * 1000:.1f} ms ({speedups[cameras]:.2f}x)")
+    return speedups
+
+# Largest share of fire-free frames (per the standard detector) the fast path may flag
+FAST_FIRE_MAX_FALSE_ALARMS = 0.01
+
+def make_fire_frames(count=300, width=1280, height=720, seed=0):
+    """Create synthetic frames with 0-3 fire-coloured blobs of varying size"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        frame = rng.integers(0, 80, (height, width, 3), dtype=np.uint8)
+        for _ in range(rng.integers(0, 4)):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            color = (0, int(rng.integers(150, 256)), int(rng.integers(200, 256)))
+            cv2.circle(frame, center, int(rng.integers(3, 40)), color, -1)
+        frames.append(frame)
+    return frames
+
+def make_noise_frames(count=20, width=1280, height=720, seed=1):
+    """Create full-range random noise frames, which hold no fire"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+def benchmark_fire_fast_path(iterations=50):
+    """
+    Compare the standard fire detector against the downscaled fast path
+    Fails if the fast path misses a fire, raises false alarms on more than
+    FAST_FIRE_MAX_FALSE_ALARMS of the fire-free frames or on any noise frame
+    """
+    print("🔥 Benchmarking fire detection fast path...")
+
+    frames = make_fire_frames()
+    noise = make_noise_frames()
+    # check_fire_smoke prints on every call; keep the benchmark output readable
+    with redirect_stdout(io.StringIO()):
+        standard = [check_fire_smoke(frame) for frame in frames]
+        fast = [check_fire_smoke(frame, fast=True) for frame in frames]
+        noise_alarms = sum(check_fire_smoke(frame, fast=True) for frame in noise)
+        standard_time = time_it(lambda: check_fire_smoke(frames[0]), iterations)
+        fast_time = time_it(lambda: check_fire_smoke(frames[0], fast=True), iterations)
+
+    agreement = sum(a == b for a, b in zip(standard, fast)) / len(frames)
+    missed = sum(a and not b for a, b in zip(standard, fast))
+    extra = sum(b and not a for a, b in zip(standard, fast))
+    false_alarm_rate = extra / max(1, len(frames) - sum(standard))
+    passed = missed == 0 and false_alarm_rate <= FAST_FIRE_MAX_FALSE_ALARMS and noise_alarms == 0
+
+    print(f"   Standard: {standard_time * 1000:.2f} ms/frame, fast: {fast_time * 1000:.2f} ms/frame "
+          f"({standard_time / fast_time:.1f}x)")
+    print(f"   Agreement: {agreement * 100:.1f}% over {len(frames)} frames "
+          f"({sum(standard)} fires, {missed} missed, {extra} extra)")
+    print(f"   False alarms: {false_alarm_rate * 100:.1f}% of fire-free frames "
+          f"(limit {FAST_FIRE_MAX_FALSE_ALARMS * 100:.0f}%), {noise_alarms}/{len(noise)} noise frames")
+    print(f"   {'✅ Fast path matches the standard detector' if passed else '❌ Fast path diverges from the standard detector'}")
+    return standard_time / fast_time, agreement, passed
+
+def main():
+    """Run all benchmarks"""
+    print("=" * 50)
+    print("⏱️ AI Event Monitoring Models Benchmark")
+    print("=" * 50)
+
+    benchmark_shared_inference()
+    print()
+
+    benchmark_batched_cameras()
+    print()
+
+    benchmark_crowd_grid()
+    print()
+
+    benchmark_backends()
+    print()
+
+    _, _, fire_passed = benchmark_fire_fast_path()
+    print()
+
+    print("=" * 50)
+    if not fire_passed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
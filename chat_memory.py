@@ -0,0 +1,95 @@
+import textwrap
+from collections import deque
+
+# Conversation turns kept verbatim; older turns are folded into a short summary
+CHAT_HISTORY_TURNS = 20
+
+# Approximate token budgets for the summary of evicted turns and for the history sent to Gemini
+SUMMARY_TOKEN_BUDGET = 200
+HISTORY_TOKEN_BUDGET = 800
+
+# Chat messages kept for display in the Streamlit chat (user and assistant messages count separately)
+CHAT_DISPLAY_LIMIT = 50
+
+def estimate_tokens(text):
+    """Rough token count for Gemini prompts (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def _format_turn(turn):
+    return f"User: {turn['user']}\nAssistant: {turn['assistant']}"
+
+class ChatMemory:
+    """
+    Bounded conversation memory
+    The last max_turns turns are kept verbatim in a ring buffer; each evicted turn is
+    reduced to a one-line digest, and the oldest digests are dropped once the summary
+    exceeds summary_budget tokens, so memory and prompt size stay constant over a shift
+    """
+
+    def __init__(self, max_turns=CHAT_HISTORY_TURNS, summary_budget=SUMMARY_TOKEN_BUDGET):
+        self.turns = deque(maxlen=max_turns)
+        self.summary_budget = summary_budget
+        self._digests = deque()
+        self._summary_tokens = 0
+        self.evicted = 0
+
+    def append(self, turn):
+        """Add a {'user', 'assistant', 'timestamp'} turn, summarizing the oldest one if full"""
+        if len(self.turns) == self.turns.maxlen:
+            self._summarize(self.turns[0])
+        self.turns.append(turn)
+
+    def _summarize(self, turn):
+        digest = (f"- asked \"{textwrap.shorten(turn['user'], 80, placeholder='...')}\", "
+                  f"answered \"{textwrap.shorten(turn['assistant'], 120, placeholder='...')}\"")
+        self._digests.append(digest)
+        self._summary_tokens += estimate_tokens(digest)
+        while self._summary_tokens > self.summary_budget and len(self._digests) > 1:
+            self._summary_tokens -= estimate_tokens(self._digests.popleft())
+        self.evicted += 1
+
+    @property
+    def summary(self):
+        """Digest of turns no longer kept verbatim ('' if none)"""
+        return "\n".join(self._digests)
+
+    def prompt_context(self, budget=HISTORY_TOKEN_BUDGET):
+        """
+        Conversation so far for the prompt, within about budget tokens
+        The summary comes first, then as many of the most recent turns as fit
+        """
+        parts = []
+        used = 0
+        if self._digests:
+            header = f"Earlier in this conversation:\n{self.summary}"
+            used = estimate_tokens(header)
+            if used <= budget:
+                parts.append(header)
+            else:
+                used = 0
+
+        recent = []
+        for turn in reversed(self.turns):
+            text = _format_turn(turn)
+            cost = estimate_tokens(text)
+            if used + cost > budget:
+                break
+            recent.append(text)
+            used += cost
+        parts.extend(reversed(recent))
+        return "\n\n".join(parts)
+
+    def clear(self):
+        self.turns.clear()
+        self._digests.clear()
+        self._summary_tokens = 0
+        self.evicted = 0
+
+    def __iter__(self):
+        return iter(self.turns)
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __getitem__(self, index):
+        return self.turns[index]
@@ -1,21 +1,89 @@
 import streamlit as st
 import google.generativeai as genai
 import json
-import sqlite3
+import queue
+import re
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
 import cv2
 import numpy as np
-from models.crowd_surge import check_crowd_surge
+from models.crowd_surge import check_crowd_surge, count_people_in_regions
 from models.fire_smoke import check_fire_smoke
 from models.unconscious import check_unconscious
+from models.detection import detect_people, latest_detections, published_cameras
+from pipeline.density_store import density_store, direction_counts
+from status_snapshot import get_status_snapshot
+from detection_log import alert_counts, hourly_alert_counts, last_detected
+from response_cache import ResponseCache
+from chat_memory import ChatMemory, CHAT_DISPLAY_LIMIT
+
+# Seconds allowed for a whole answer, and for the first words of it
+LLM_TIMEOUT = 30.0
+FIRST_TOKEN_TIMEOUT = 10.0
+
+# Seconds between checks of the caller's cancel event while waiting for the next piece
+CANCEL_POLL_INTERVAL = 0.05
+
+# Queue sentinel marking the end of a streamed answer
+_DONE = object()
+
+# Intent router: questions matching these patterns are answered from local data without Gemini
+# Open-ended questions (advice, explanations) always go to Gemini
+ESCALATE_PATTERN = re.compile(r"\b(why|should|recommend|suggest|explain|advice|advise|what to do|how (do|can|should) (i|we))\b")
+STATS_PATTERN = re.compile(r"\b(statistics|stats|summary|history|how many (alerts|detections)|alerts? (today|this|in the|over the|for the|during))\b")
+STATUS_PATTERN = re.compile(r"\b(system status|system health|overall status|status of the system|is the system (up|working|running|ok))\b")
+CROWD_PATTERN = re.compile(r"\b(crowd|crowded|people|persons?|busy|busiest|how many)\b")
+TOTAL_PATTERN = re.compile(r"\b(main area|total|overall|everywhere|in all|whole)\b")
+
+# Compound directions first so "north-east" is not read as "north"
+DIRECTION_PATTERNS = [
+    ('northeast', re.compile(r"\bnorth[\s-]*east|\bne\b")),
+    ('northwest', re.compile(r"\bnorth[\s-]*west|\bnw\b")),
+    ('southeast', re.compile(r"\bsouth[\s-]*east|\bse\b")),
+    ('southwest', re.compile(r"\bsouth[\s-]*west|\bsw\b")),
+    ('north', re.compile(r"\bnorth")),
+    ('south', re.compile(r"\bsouth")),
+    ('east', re.compile(r"\beast")),
+    ('west', re.compile(r"\bwest"))
+]
+
+DETECTOR_PATTERNS = {
+    'fire': re.compile(r"\b(fire|smoke|flames?)\b"),
+    'unconscious': re.compile(r"\b(unconscious|collapsed?|fainted|fallen|lying)\b"),
+    'crowd': re.compile(r"\b(surge|stampede|crush)\b")
+}
+
+DETECTOR_LABELS = {
+    'fire': "🔥 Fire/smoke",
+    'crowd': "👥 Crowd surge",
+    'unconscious': "🚑 Unconscious person"
+}
+
+WINDOW_PATTERN = re.compile(r"\b(?:last|past) (\d+)? ?(minute|hour|day|week)s?\b")
+WINDOW_UNITS = {'minute': 60, 'hour': 3600, 'day': 86400, 'week': 7 * 86400}
+
+# Questions that refer back to the conversation; their answers depend on it, so they are never cached
+FOLLOW_UP_PATTERN = re.compile(r"\b(it|its|that|this|those|these|they|them|their|he|she|him|her|more|else|again|also|"
+                               r"above|earlier|previous|before|you said|what about|how about|continue|elaborate|go on)\b"
+                               r"|^(and|but|so|then|ok|okay)\b")
 
 class EventMonitorChatbot:
-    def __init__(self, api_key):
-        """Initialize the chatbot with Gemini API"""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.chat_history = []
+    def __init__(self, api_key, model=None):
+        """Initialize the chatbot with Gemini API (or a stand-in model such as llm_stub)"""
+        if model is None:
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel('gemini-1.5-flash')
+        self.model = model
+        # Answers to self-contained questions reused while the question and live state are unchanged
+        self.response_cache = ResponseCache()
+        # Last turns verbatim plus a summary of older ones
+        self.chat_history = ChatMemory()
         self.system_prompt = self._get_system_prompt()
+        # Intent router counters: questions answered locally vs sent to Gemini
+        self.router_counts = {}
+        self.escalated = 0
         
     def _get_system_prompt(self):
         """Get the system prompt for the chatbot"""
@@ -60,32 +128,14 @@ class EventMonitorChatbot:
     def get_system_status(self):
         """Get current system status and statistics"""
         try:
-            # Get database statistics
-            conn = sqlite3.connect('admin_auth.db')
-            cursor = conn.cursor()
-            
-            # Get recent alerts
-            cursor.execute("""
-                SELECT action, COUNT(*) as count 
-                FROM audit_log 
-                WHERE timestamp > ? 
-                AND action IN ('fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected')
-                GROUP BY action
-            """, (datetime.now() - timedelta(hours=24),))
-            
-            recent_alerts = dict(cursor.fetchall())
-            
-            # Get active sessions
-            cursor.execute("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (datetime.now(),))
-            active_sessions = cursor.fetchone()[0]
-            
-            conn.close()
+            # Counters kept in memory by the status snapshot service
+            snapshot = get_status_snapshot().get()
             
             return {
-                'recent_alerts': recent_alerts,
-                'active_sessions': active_sessions,
+                'recent_alerts': snapshot['recent_alerts'],
+                'active_sessions': snapshot['active_sessions'],
                 'system_status': 'operational',
-                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'last_updated': datetime.fromtimestamp(snapshot['refreshed_at']).strftime('%Y-%m-%d %H:%M:%S')
             }
         except Exception as e:
             return {
@@ -94,60 +144,112 @@ class EventMonitorChatbot:
                 'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
 
-    def analyze_crowd_direction(self, frame, direction):
-        """Analyze crowd in a specific direction"""
+    def _direction_regions(self, width, height):
+        """Directional regions as (x1, y1, x2, y2) for a frame of the given size"""
+        return {
+            'north': (0, 0, width, height//2),
+            'south': (0, height//2, width, height),
+            'east': (width//2, 0, width, height),
+            'west': (0, 0, width//2, height),
+            'northeast': (width//2, 0, width, height//2),
+            'northwest': (0, 0, width//2, height//2),
+            'southeast': (width//2, height//2, width, height),
+            'southwest': (0, height//2, width//2, height)
+        }
+
+    def _latest_or_detect(self, frame=None, camera=None):
+        """
+        (detections, detected_at) from one YOLO pass over the full frame, or the
+        last detections published by the monitoring loop when no frame is given
+        Returns an error message string when no detections are available
+        """
+        if frame is None:
+            latest = latest_detections(camera)
+            if latest is None:
+                return "No live detections available yet. Start monitoring or provide a frame."
+            return latest
+        
+        detections = detect_people(frame)
+        if detections is None:
+            return "YOLO model could not be loaded"
+        return detections, None
+
+    def analyze_all_directions(self, frame=None, camera=None):
+        """
+        Analyze crowd in all eight directions from a single detection pass
+        Every person is assigned to each direction whose region holds their box centre
+        """
         try:
-            height, width = frame.shape[:2]
-            
-            # Define directional regions
-            regions = {
-                'north': (0, 0, width, height//2),
-                'south': (0, height//2, width, height),
-                'east': (width//2, 0, width, height),
-                'west': (0, 0, width//2, height),
-                'northeast': (width//2, 0, width, height//2),
-                'northwest': (0, 0, width//2, height//2),
-                'southeast': (width//2, height//2, width, height),
-                'southwest': (0, height//2, width//2, height)
-            }
-            
-            if direction.lower() not in regions:
-                return f"Direction '{direction}' not supported. Use: {', '.join(regions.keys())}"
-            
-            x1, y1, x2, y2 = regions[direction.lower()]
-            region_frame = frame[y1:y2, x1:x2]
-            
-            # Analyze crowd in this region
-            crowd_count = self._count_people_in_region(region_frame)
-            density = self._calculate_density(crowd_count, (x2-x1)*(y2-y1))
-            
-            return {
-                'direction': direction,
-                'crowd_count': crowd_count,
-                'density': density,
-                'status': 'high' if crowd_count > 10 else 'medium' if crowd_count > 5 else 'low'
+            detected = self._latest_or_detect(frame, camera)
+            if isinstance(detected, str):
+                return detected
+            detections, detected_at = detected
+            height, width = detections.frame_shape[:2]
+            
+            regions = self._direction_regions(width, height)
+            bounds = np.array(list(regions.values()))
+            counts = count_people_in_regions(detections, bounds)
+            areas = (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+            
+            directions = {}
+            for direction, count, area in zip(regions, counts, areas):
+                count = int(count)
+                directions[direction] = {
+                    'crowd_count': count,
+                    'density': self._calculate_density(count, int(area)),
+                    'status': 'high' if count > 10 else 'medium' if count > 5 else 'low'
+                }
+            
+            analysis = {
+                'total_people': len(detections),
+                'busiest_direction': max(directions, key=lambda d: directions[d]['density']),
+                'directions': directions
             }
+            if detected_at is not None:
+                analysis['detected_at'] = datetime.fromtimestamp(detected_at).strftime('%Y-%m-%d %H:%M:%S')
+            return analysis
             
         except Exception as e:
-            return f"Error analyzing {direction} direction: {str(e)}"
+            return f"Error analyzing crowd directions: {str(e)}"
 
-    def _count_people_in_region(self, region_frame):
-        """Count people in a specific region using YOLOv8"""
-        try:
-            from ultralytics import YOLO
-            model = YOLO("yolov8n.pt")
-            results = model(region_frame)
-            
-            person_count = 0
-            for r in results:
-                for box in r.boxes:
-                    cls = int(box.cls[0])
-                    if cls == 0:  # person class
-                        person_count += 1
-            
-            return person_count
-        except Exception as e:
-            return f"Error counting people: {str(e)}"
+    def analyze_crowd_direction(self, frame=None, direction='north', camera=None):
+        """
+        Analyze crowd in a specific direction
+        Without a frame the last detections published by the monitoring loop are used,
+        so no new inference is run
+        """
+        directions = self._direction_regions(1, 1).keys()
+        if direction.lower() not in directions:
+            return f"Direction '{direction}' not supported. Use: {', '.join(directions)}"
+        
+        analysis = self.analyze_all_directions(frame, camera)
+        if isinstance(analysis, str):
+            return analysis
+        
+        result = {'direction': direction}
+        result.update(analysis['directions'][direction.lower()])
+        if 'detected_at' in analysis:
+            result['detected_at'] = analysis['detected_at']
+        return result
+
+    def get_crowd_density(self, camera=None, window_seconds=60):
+        """
+        Live people counts per direction recorded by the monitoring loop
+        Returns {camera: {'latest', 'average', 'peak', 'samples'}} over the last window_seconds
+        """
+        cameras = [camera] if camera is not None else density_store.cameras()
+        density = {}
+        for cam in cameras:
+            window = density_store.window(cam, window_seconds)
+            if window is None:
+                continue
+            density[cam] = {
+                'latest': direction_counts(window['latest']),
+                'average': direction_counts(window['mean']),
+                'peak': direction_counts(window['max']),
+                'samples': window['samples']
+            }
+        return density
 
     def _calculate_density(self, person_count, area):
         """Calculate crowd density"""
@@ -156,89 +258,314 @@ class EventMonitorChatbot:
         return 0
 
     def get_historical_data(self, hours=24):
-        """Get historical alert data"""
+        """Get historical alert data (per UTC hour)"""
         try:
-            conn = sqlite3.connect('admin_auth.db')
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT action, timestamp 
-                FROM audit_log 
-                WHERE timestamp > ? 
-                AND action IN ('fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected')
-                ORDER BY timestamp DESC
-            """, (datetime.now() - timedelta(hours=hours),))
-            
-            alerts = cursor.fetchall()
-            conn.close()
-            
-            # Group by hour
-            hourly_stats = {}
-            for action, timestamp in alerts:
-                hour = timestamp[:13]  # YYYY-MM-DD HH
-                if hour not in hourly_stats:
-                    hourly_stats[hour] = {'fire': 0, 'crowd': 0, 'unconscious': 0}
-                
-                if 'fire' in action:
-                    hourly_stats[hour]['fire'] += 1
-                elif 'crowd' in action:
-                    hourly_stats[hour]['crowd'] += 1
-                elif 'unconscious' in action:
-                    hourly_stats[hour]['unconscious'] += 1
-            
-            return hourly_stats
+            # Grouped by hour and detector in SQL
+            return hourly_alert_counts(datetime.now() - timedelta(hours=hours))
             
         except Exception as e:
             return f"Error getting historical data: {str(e)}"
 
-    def process_query(self, user_query, current_frame=None):
-        """Process user query and generate response"""
+    def _query_window(self, query):
+        """(since datetime, label) for the time window a question asks about (default: last 24 hours)"""
+        now = datetime.now()
+        if re.search(r"\btoday\b", query):
+            return now.replace(hour=0, minute=0, second=0, microsecond=0), "today"
+        match = WINDOW_PATTERN.search(query)
+        if match:
+            amount = int(match.group(1) or 1)
+            unit = match.group(2)
+            return now - timedelta(seconds=amount * WINDOW_UNITS[unit]), f"in the last {amount} {unit}{'s' if amount > 1 else ''}"
+        if re.search(r"\bthis week\b", query):
+            return now - timedelta(days=7), "in the last 7 days"
+        return now - timedelta(hours=24), "in the last 24 hours"
+
+    def _match_intent(self, user_query):
+        """(intent, argument) for a question the router can answer from local data, or None"""
+        query = user_query.lower()
+        if ESCALATE_PATTERN.search(query):
+            return None
+
+        detectors = [name for name, pattern in DETECTOR_PATTERNS.items() if pattern.search(query)]
+        if STATS_PATTERN.search(query):
+            return 'alert_stats', detectors
+        if detectors:
+            return 'detector_status', detectors
+        if STATUS_PATTERN.search(query):
+            return 'system_status', None
+        if CROWD_PATTERN.search(query):
+            for direction, pattern in DIRECTION_PATTERNS:
+                if pattern.search(query):
+                    return 'direction_count', direction
+            if TOTAL_PATTERN.search(query):
+                return 'total_count', None
+        return None
+
+    def _answer_alert_stats(self, query, detectors):
+        since, label = self._query_window(query)
+        counts = alert_counts(since)
+        shown = detectors or list(DETECTOR_LABELS)
+        lines = [f"📊 **Alerts {label}:**"]
+        lines += [f"- {DETECTOR_LABELS[name]}: {counts.get(name, 0)}" for name in shown]
+        if len(shown) > 1:
+            lines.append(f"- Total: {sum(counts.get(name, 0) for name in shown)}")
+        return "\n".join(lines)
+
+    def _answer_detector_status(self, query, detectors):
+        last_hour = alert_counts(datetime.now() - timedelta(hours=1))
+        last_day = alert_counts(datetime.now() - timedelta(hours=24))
+        last = last_detected()
+        lines = []
+        for name in detectors:
+            if last_hour.get(name):
+                state = f"⚠️ {last_hour[name]} detection(s) in the last hour"
+            else:
+                state = "✅ nothing detected in the last hour"
+            seen = (f", last at {datetime.fromtimestamp(last[name]).strftime('%Y-%m-%d %H:%M:%S')}"
+                    if name in last else "")
+            lines.append(f"{DETECTOR_LABELS[name]}: {state} ({last_day.get(name, 0)} in the last 24 hours{seen})")
+        return "\n".join(lines)
+
+    def _answer_system_status(self):
+        status = self.get_system_status()
+        if 'error' in status:
+            return f"❌ System status unavailable: {status['error']}"
+        alerts = status['recent_alerts']
+        return (f"✅ System {status['system_status']} • {status['active_sessions']} active session(s) • "
+                f"alerts in the last 24 hours: " +
+                ", ".join(f"{DETECTOR_LABELS[name]} {alerts.get(name, 0)}" for name in DETECTOR_LABELS))
+
+    def _people(self, count):
+        return f"{count} {'person' if count == 1 else 'people'}"
+
+    def _answer_crowd(self, direction=None):
+        """
+        People in view (or in one direction) summed over every camera that has published
+        detections; None when there are no live detections, so the question goes to Gemini
+        """
+        analyses = {}
+        for camera in published_cameras():
+            analysis = self.analyze_all_directions(camera=camera)
+            if not isinstance(analysis, str):
+                analyses[camera] = analysis
+        if not analyses:
+            return None
+
+        total = sum(analysis['total_people'] for analysis in analyses.values())
+        times = [analysis['detected_at'] for analysis in analyses.values() if 'detected_at' in analysis]
+        seen = f" as of {max(times)}" if times else ""
+        where = (f"camera {next(iter(analyses))}" if len(analyses) == 1
+                 else f"{len(analyses)} cameras")
+
+        if direction is None:
+            # Busiest direction by density summed over the cameras
+            busiest = max(next(iter(analyses.values()))['directions'],
+                          key=lambda d: sum(analysis['directions'][d]['density'] for analysis in analyses.values()))
+            return f"👥 {self._people(total)} in view on {where}{seen}; busiest direction: {busiest}."
+
+        counts = {camera: analysis['directions'][direction]['crowd_count'] for camera, analysis in analyses.items()}
+        if len(analyses) == 1:
+            data = next(iter(analyses.values()))['directions'][direction]
+            return (f"👥 {self._people(data['crowd_count'])} in the {direction} area on {where}{seen} — "
+                    f"{data['status']} crowd level ({total} in view overall).")
+        breakdown = ", ".join(f"camera {camera}: {count}" for camera, count in counts.items())
+        return (f"👥 {self._people(sum(counts.values()))} in the {direction} area across {where}{seen} "
+                f"({breakdown}; {total} in view overall).")
+
+    def route_query(self, user_query):
+        """
+        Answer structured questions (direction counts, detector status, alert statistics,
+        system status) from local detector state and the database without calling Gemini
+        Returns None for free-form questions, which are left to the LLM
+        """
+        intent = self._match_intent(user_query)
+        answer = None
+        if intent is not None:
+            name, argument = intent
+            query = user_query.lower()
+            try:
+                if name == 'alert_stats':
+                    answer = self._answer_alert_stats(query, argument)
+                elif name == 'detector_status':
+                    answer = self._answer_detector_status(query, argument)
+                elif name == 'system_status':
+                    answer = self._answer_system_status()
+                else:
+                    answer = self._answer_crowd(argument)
+            except Exception as e:
+                print(f"Error answering {name} locally: {e}")
+                answer = None
+        if answer is None:
+            self.escalated += 1
+        else:
+            self.router_counts[intent[0]] = self.router_counts.get(intent[0], 0) + 1
+        return answer
+
+    def router_stats(self):
+        """Questions answered locally per intent, sent to Gemini, and the router hit rate"""
+        routed = sum(self.router_counts.values())
+        total = routed + self.escalated
+        return {
+            'routed': routed,
+            'escalated': self.escalated,
+            'hit_rate': routed / total if total else 0.0,
+            'by_intent': dict(self.router_counts)
+        }
+
+    def _context_fingerprint(self, system_status, crowd_density):
+        """The parts of the live context an answer depends on (timestamps and running averages excluded)"""
+        status = {key: value for key, value in system_status.items() if key != 'last_updated'}
+        return {
+            'status': status,
+            'density': {cam: data['latest'] for cam, data in crowd_density.items()}
+        }
+
+    def _self_contained(self, user_query):
+        """True if the question can be answered without the conversation so far (and so may be cached)"""
+        return not FOLLOW_UP_PATTERN.search(user_query.lower().strip())
+
+    def _short_number(self, value):
+        value = round(value, 1)
+        return int(value) if value == int(value) else value
+
+    def _compact(self, value):
+        """JSON without whitespace, for prompt context"""
+        return json.dumps(value, separators=(',', ':'), default=str)
+
+    def _build_prompt(self, user_query, system_status, crowd_density, history):
+        """Prompt parts for Gemini: system prompt, conversation so far, live context and the question"""
+        # One decimal is plenty for per-direction averages and keeps the prompt short
+        density = {cam: {key: ({d: self._short_number(v) for d, v in value.items()} if isinstance(value, dict) else value)
+                         for key, value in data.items()}
+                   for cam, data in crowd_density.items()}
+        context = "\n".join([
+            f"System Status: {self._compact(system_status)}",
+            "Live Crowd Density (people per direction per camera, last minute): "
+            + (self._compact(density) if density else "No live data (monitoring not running)"),
+            "Available Functions: directional crowd analysis (N, S, E, W, NE, NW, SE, SW), fire/smoke detection, "
+            "unconscious person detection, historical alert data, system health",
+            f"Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        ])
+        
+        prompt = [self.system_prompt]
+        if history:
+            prompt.append(f"Conversation so far:\n{history}")
+        prompt.extend([context, f"User: {user_query}\nAssistant:"])
+        return prompt
+
+    def _error_message(self, error):
+        return f"I apologize, but I encountered an error processing your query: {str(error)}. Please try again or contact system administrator."
+
+    def _generate(self, prompt, chunks, stop, timeout):
+        """Worker thread: stream the answer from Gemini into chunks until done or stopped"""
+        try:
+            response = self.model.generate_content(prompt, stream=True, request_options={'timeout': timeout})
+            for chunk in response:
+                if stop.is_set():
+                    break
+                if chunk.text:
+                    chunks.put(chunk.text)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            chunks.put(_DONE)
+
+    def stream_query(self, user_query, timeout=LLM_TIMEOUT, first_token_timeout=FIRST_TOKEN_TIMEOUT, cancel=None,
+                     use_cache=True):
+        """
+        Yield the answer piece by piece as Gemini produces it
+        The request runs on a worker thread, so the caller only waits for the next piece.
+        Stops after timeout seconds, when cancel (a threading.Event) is set or when the
+        caller closes the generator (cancel is only read, so the caller may reuse it);
+        the answer so far is kept in the chat history.
+        Structured questions are answered locally by route_query, and a self-contained
+        question already answered under the same live state is served from the response cache
+        (use_cache=False always asks Gemini, e.g. to check the API is reachable)
+        """
+        cancel = cancel or threading.Event()
+        # Stops the worker thread once we are done, whatever the reason
+        stop = threading.Event()
+        pieces = []
         try:
+            routed = self.route_query(user_query)
+            if routed is not None:
+                pieces.append(routed)
+                yield routed
+                return
+
             # Get system context
             system_status = self.get_system_status()
-            
-            # Prepare context for Gemini
-            context = f"""
-            System Status: {json.dumps(system_status, indent=2)}
-            
-            User Query: {user_query}
-            
-            Available Functions:
-            - Crowd analysis in any direction (North, South, East, West, NE, NW, SE, SW)
-            - Fire/smoke detection status
-            - Unconscious person detection
-            - Historical alert data
-            - System health monitoring
-            
-            Current Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
-            
-            # Generate response using Gemini
-            response = self.model.generate_content([
-                self.system_prompt,
-                context,
-                f"User: {user_query}\nAssistant:"
-            ])
-            
-            # Add to chat history
-            self.chat_history.append({
-                'user': user_query,
-                'assistant': response.text,
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-            
-            return response.text
-            
+            crowd_density = self.get_crowd_density()
+
+            # Only self-contained questions use the cache: their answers depend on the live
+            # context but not on the conversation, which changes after every turn
+            cache_key = None
+            if use_cache and self._self_contained(user_query):
+                cache_key = self.response_cache.key(user_query, self._context_fingerprint(system_status, crowd_density))
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    pieces.append(cached)
+                    yield cached
+                    return
+
+            history = self.chat_history.prompt_context()
+
+            prompt = self._build_prompt(user_query, system_status, crowd_density, history)
+            chunks = queue.Queue()
+            threading.Thread(target=self._generate, args=(prompt, chunks, stop, timeout), daemon=True).start()
+
+            deadline = time.monotonic() + timeout
+            first_deadline = time.monotonic() + first_token_timeout
+            while not cancel.is_set():
+                remaining = (deadline if pieces else min(deadline, first_deadline)) - time.monotonic()
+                if remaining <= 0:
+                    piece = ("\n\n" if pieces else "") + "⏱️ The assistant is taking too long to answer. Please try again."
+                    pieces.append(piece)
+                    yield piece
+                    break
+                # Wait in short steps so a cancel is noticed without waiting for the model
+                try:
+                    item = chunks.get(timeout=min(remaining, CANCEL_POLL_INTERVAL))
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    # Only complete answers are reused
+                    if cache_key is not None and pieces and not cancel.is_set():
+                        self.response_cache.put(cache_key, "".join(pieces))
+                    break
+                if isinstance(item, Exception):
+                    piece = self._error_message(item)
+                    pieces.append(piece)
+                    yield piece
+                    break
+                pieces.append(item)
+                yield item
         except Exception as e:
-            return f"I apologize, but I encountered an error processing your query: {str(e)}. Please try again or contact system administrator."
+            piece = self._error_message(e)
+            pieces.append(piece)
+            yield piece
+        finally:
+            # Tell the worker to stop if we finished early (timeout, cancel or closed generator)
+            stop.set()
+            if pieces:
+                # Add to chat history
+                self.chat_history.append({
+                    'user': user_query,
+                    'assistant': "".join(pieces),
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+
+    def process_query(self, user_query, current_frame=None, timeout=LLM_TIMEOUT, use_cache=True):
+        """Process user query and generate response"""
+        return "".join(self.stream_query(user_query, timeout=timeout, use_cache=use_cache))
 
     def get_chat_history(self):
-        """Get chat history"""
-        return self.chat_history
+        """Get chat history (the most recent turns)"""
+        return list(self.chat_history)
 
     def clear_chat_history(self):
         """Clear chat history"""
-        self.chat_history = []
+        self.chat_history.clear()
 
 def create_chatbot_interface():
     """Create the chatbot interface for Streamlit"""
@@ -255,7 +582,8 @@ def create_chatbot_interface():
     
     # Chat history
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        # Only the latest messages are kept and re-rendered
+        st.session_state.chat_history = deque(maxlen=CHAT_DISPLAY_LIMIT)
     
     # Display chat history
     for message in st.session_state.chat_history:
@@ -276,9 +604,8 @@ def create_chatbot_interface():
                 'timestamp': datetime.now().strftime('%H:%M:%S')
             })
             
-            # Get response from chatbot
-            with st.spinner("Thinking..."):
-                response = st.session_state.chatbot.process_query(user_input)
+            # Stream the response from chatbot as it arrives instead of waiting for all of it
+            response = st.write_stream(st.session_state.chatbot.stream_query(user_input))
             
             # Add assistant response to history
             st.session_state.chat_history.append({
@@ -307,7 +634,7 @@ def create_chatbot_interface():
     
     with col3:
         if st.button("🗑️ Clear Chat"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.session_state.chatbot.clear_chat_history()
             st.rerun()
     
@@ -332,8 +659,8 @@ def create_chatbot_interface():
                 'timestamp': datetime.now().strftime('%H:%M:%S')
             })
             
-            with st.spinner("Thinking..."):
-                response = st.session_state.chatbot.process_query(example)
+            # Stream the answer as it arrives instead of waiting for all of it
+            response = st.write_stream(st.session_state.chatbot.stream_query(example))
             
             st.session_state.chat_history.append({
                 'role': 'assistant',
@@ -0,0 +1,273 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# SQLite database shared by the dashboards, admin panel and chatbot
+DB_PATH = 'admin_auth.db'
+
+# Seconds a connection waits on a locked database before raising
+BUSY_TIMEOUT = 5.0
+
+# Prepared statements kept per connection (sqlite3 reuses them for identical SQL)
+STATEMENT_CACHE_SIZE = 256
+
+# Idle connections kept open per database file; busier moments open extra ones,
+# which are closed when they are handed back to a full pool
+POOL_SIZE = 8
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _connect(path):
+    """Open a connection configured for concurrent readers and a single writer"""
+    # Pooled connections move between threads (Streamlit runs every rerun on a new one);
+    # the pool hands each connection to one caller at a time
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, cached_statements=STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
+    # Lets retention release freed pages; only takes effect on new database files
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    # WAL lets the dashboard read while the monitoring loop writes
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}")
+    return conn
+
+def _pool(path):
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = queue.LifoQueue(maxsize=POOL_SIZE)
+        return pool
+
+@contextmanager
+def connection():
+    """
+    Borrow a connection to DB_PATH from the process-wide pool for the duration of the block
+    Connections outlive threads and script reruns, so their setup and statement cache are reused
+    """
+    pool = _pool(DB_PATH)
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _connect(DB_PATH)
+    try:
+        yield conn
+    finally:
+        # Never hand a connection back in the middle of a transaction
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+def close_connections():
+    """Close the idle pooled connections of every database (they are reopened on next use)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        while True:
+            try:
+                pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+def query_one(sql, params=()):
+    """Run a SELECT and return the first row, or None"""
+    with connection() as conn:
+        cursor = conn.execute(sql, params)
+        row = cursor.fetchone()
+        # Finish the statement so the connection does not keep a read snapshot open
+        cursor.close()
+        return row
+
+def query_all(sql, params=()):
+    """Run a SELECT and return all rows"""
+    with connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def execute(sql, params=()):
+    """Run a single write statement in its own transaction and return the cursor"""
+    with connection() as conn:
+        with conn:
+            return conn.execute(sql, params)
+
+def execute_many(sql, rows):
+    """Run a write statement for every parameter row in one transaction"""
+    with connection() as conn:
+        with conn:
+            return conn.executemany(sql, rows)
+
+@contextmanager
+def transaction():
+    """
+    Group several statements into one transaction
+    Yields a cursor; commits on success and rolls back on error
+    """
+    with connection() as conn:
+        with conn:
+            yield conn.cursor()
+
+# Versioned schema migrations: (version, description, statements)
+# Applied in order, each in its own transaction; never edit a released migration, add a new one
+MIGRATIONS = [
+    (1, "create users, sessions and audit_log", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            session_token TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            ip_address TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        '''
+    ]),
+    (2, "index audit_log by action/timestamp and sessions by expiry", [
+        # Alert statistics filter on action and a time window; this index covers them
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_action_timestamp ON audit_log (action, timestamp)",
+        # Recent-activity counts and newest-first listings
+        "CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp ON audit_log (timestamp)",
+        # Active session counts (token lookups already use the UNIQUE index)
+        "CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)"
+    ]),
+    (3, "typed detections table, backfilled from alert rows in audit_log", [
+        '''
+        CREATE TABLE IF NOT EXISTS detections (
+            id INTEGER PRIMARY KEY,
+            camera_id INTEGER,
+            detector TEXT NOT NULL,
+            detected_at INTEGER NOT NULL,
+            score REAL,
+            count INTEGER,
+            bbox_x1 REAL,
+            bbox_y1 REAL,
+            bbox_x2 REAL,
+            bbox_y2 REAL,
+            user_id INTEGER
+        )
+        ''',
+        # detected_at is a unix epoch in seconds; time-window aggregates per detector and per camera
+        "CREATE INDEX IF NOT EXISTS idx_detections_detector_time ON detections (detector, detected_at)",
+        "CREATE INDEX IF NOT EXISTS idx_detections_camera_time ON detections (camera_id, detected_at)",
+        "CREATE INDEX IF NOT EXISTS idx_detections_time ON detections (detected_at)",
+        # Alerts logged before this table existed (camera unknown)
+        '''
+        INSERT INTO detections (detector, detected_at, user_id)
+        SELECT CASE action
+                   WHEN 'fire_alert_detected' THEN 'fire'
+                   WHEN 'crowd_surge_alert_detected' THEN 'crowd'
+                   ELSE 'unconscious'
+               END,
+               CAST(strftime('%s', timestamp) AS INTEGER),
+               user_id
+        FROM audit_log
+        WHERE action IN ('fire_alert_detected', 'crowd_surge_alert_detected', 'unconscious_person_alert_detected')
+        AND strftime('%s', timestamp) IS NOT NULL
+        '''
+    ]),
+    (4, "per-minute/hour/day detection rollups maintained by trigger", [
+        # resolution: bucket size in seconds; bucket: epoch of the bucket start, aligned to UTC
+        # (hour buckets start on the UTC hour, day buckets are UTC days); camera_id -1 = unknown
+        '''
+        CREATE TABLE IF NOT EXISTS detection_rollups (
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            detector TEXT NOT NULL,
+            camera_id INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (resolution, bucket, detector, camera_id)
+        ) WITHOUT ROWID
+        ''',
+        '''
+        INSERT INTO detection_rollups (resolution, bucket, detector, camera_id, count)
+        SELECT r.resolution, d.detected_at - d.detected_at % r.resolution, d.detector, COALESCE(d.camera_id, -1), COUNT(*)
+        FROM detections d
+        CROSS JOIN (SELECT 60 AS resolution UNION ALL SELECT 3600 UNION ALL SELECT 86400) r
+        GROUP BY 1, 2, 3, 4
+        ''',
+        # Every new detection increments its minute, hour and day buckets in the same transaction
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_detections_rollup AFTER INSERT ON detections
+        BEGIN
+            INSERT INTO detection_rollups (resolution, bucket, detector, camera_id, count)
+            VALUES (60, NEW.detected_at - NEW.detected_at % 60, NEW.detector, COALESCE(NEW.camera_id, -1), 1)
+            ON CONFLICT (resolution, bucket, detector, camera_id) DO UPDATE SET count = count + 1;
+            INSERT INTO detection_rollups (resolution, bucket, detector, camera_id, count)
+            VALUES (3600, NEW.detected_at - NEW.detected_at % 3600, NEW.detector, COALESCE(NEW.camera_id, -1), 1)
+            ON CONFLICT (resolution, bucket, detector, camera_id) DO UPDATE SET count = count + 1;
+            INSERT INTO detection_rollups (resolution, bucket, detector, camera_id, count)
+            VALUES (86400, NEW.detected_at - NEW.detected_at % 86400, NEW.detector, COALESCE(NEW.camera_id, -1), 1)
+            ON CONFLICT (resolution, bucket, detector, camera_id) DO UPDATE SET count = count + 1;
+        END
+        '''
+    ])
+]
+
+def _schema_version(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+def schema_version():
+    """Highest migration version applied to the database (0 for a new database)"""
+    with connection() as conn:
+        return _schema_version(conn)
+
+def migrate(target=None):
+    """
+    Apply pending migrations up to target (default: all)
+    Safe to run from several processes at once; returns the resulting schema version
+    """
+    with connection() as conn:
+        current = _schema_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current or (target is not None and version > target):
+                continue
+            # IMMEDIATE takes the write lock up front so concurrent migrators queue behind us
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                    # Another process applied it while we waited for the lock
+                    conn.rollback()
+                    continue
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute("INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                             (version, description))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            current = version
+        return _schema_version(conn)
+
+def init_schema():
+    """Create or upgrade the database schema to the latest version"""
+    return migrate()
@@ -0,0 +1,111 @@
+import time
+from database import query_all
+from audit_writer import get_audit_writer
+
+# Detector names stored in detections.detector
+DETECTORS = ('fire', 'crowd', 'unconscious')
+
+INSERT_DETECTION = '''
+    INSERT INTO detections (camera_id, detector, detected_at, score, count,
+                            bbox_x1, bbox_y1, bbox_x2, bbox_y2, user_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+def _epoch(since):
+    """Unix epoch seconds for a datetime or a number"""
+    return int(since.timestamp()) if hasattr(since, 'timestamp') else int(since)
+
+def log_detection(camera_id, detector, score=None, count=None, bbox=None, user_id=None, detected_at=None):
+    """
+    Queue a detection for the background writer
+    bbox is an (x1, y1, x2, y2) summary of the detected area, or None
+    Returns False if the write queue was full and the row was dropped
+    """
+    if detected_at is None:
+        detected_at = time.time()
+    x1, y1, x2, y2 = bbox if bbox is not None else (None, None, None, None)
+    return get_audit_writer().enqueue(INSERT_DETECTION, (camera_id, detector, int(detected_at), score, count,
+                                                         x1, y1, x2, y2, user_id))
+
+def summarize_people(detections):
+    """(score, count, bbox) for PersonDetections: best confidence, number of people and the box around them all"""
+    if detections is None or len(detections) == 0:
+        return None, 0, None
+    boxes = detections.boxes
+    bbox = (float(boxes[:, 0].min()), float(boxes[:, 1].min()), float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+    return float(detections.confidences.max()), len(detections), bbox
+
+def alert_counts(since):
+    """{detector: number of detections} since a datetime or epoch"""
+    rows = query_all(f'''
+        SELECT detector, COUNT(*)
+        FROM detections
+        WHERE detector IN ({', '.join('?' * len(DETECTORS))}) AND detected_at > ?
+        GROUP BY detector
+    ''', DETECTORS + (_epoch(since),))
+    return dict(rows)
+
+# Rollup bucket sizes in seconds, finest first (see detection_rollups)
+ROLLUP_RESOLUTIONS = (60, 3600, 86400)
+
+def pick_resolution(since, until, max_buckets=200):
+    """
+    Rollup resolution for a time window: the finest one that needs at most max_buckets
+    buckets, falling back to the coarsest (daily) rollup for very long windows
+    """
+    span = max(1, _epoch(until) - _epoch(since))
+    for resolution in ROLLUP_RESOLUTIONS:
+        if span / resolution <= max_buckets:
+            return resolution
+    return ROLLUP_RESOLUTIONS[-1]
+
+def alert_timeline(since, until=None, resolution=None, max_buckets=200, camera_id=None):
+    """
+    Detections per time bucket and detector, read from the rollup tables
+    Buckets are aligned to UTC (epoch % resolution): hourly buckets start on the UTC hour
+    and daily buckets are UTC days, whatever the server's timezone
+    The cost depends on the number of buckets, not on the number of detections
+    Returns (resolution, {bucket start epoch: {'fire': n, 'crowd': n, 'unconscious': n}}) oldest first
+    """
+    if until is None:
+        until = time.time()
+    if resolution is None:
+        resolution = pick_resolution(since, until, max_buckets)
+    start = _epoch(since) - _epoch(since) % resolution
+
+    sql = '''
+        SELECT bucket, detector, SUM(count)
+        FROM detection_rollups
+        WHERE resolution = ? AND bucket >= ? AND bucket < ?
+    '''
+    params = [resolution, start, _epoch(until)]
+    if camera_id is not None:
+        sql += " AND camera_id = ?"
+        params.append(camera_id)
+    sql += " GROUP BY bucket, detector ORDER BY bucket"
+
+    timeline = {}
+    for bucket, detector, count in query_all(sql, params):
+        timeline.setdefault(bucket, {name: 0 for name in DETECTORS})[detector] = count
+    return resolution, timeline
+
+def hourly_alert_counts(since):
+    """
+    Detections per UTC hour and detector since a datetime or epoch, newest hour first
+    Labels are UTC because the rollup buckets are; in half-hour-offset timezones a local
+    label would cover :30 to :30
+    Returns {'YYYY-MM-DD HH:00 UTC': {'fire': n, 'crowd': n, 'unconscious': n}}
+    """
+    _, timeline = alert_timeline(since, resolution=3600)
+    return {time.strftime('%Y-%m-%d %H:00 UTC', time.gmtime(bucket)): counts
+            for bucket, counts in sorted(timeline.items(), reverse=True)}
+
+def last_detected():
+    """{detector: epoch of its most recent detection} for detectors seen at least once"""
+    last = {}
+    for detector in DETECTORS:
+        # One index seek per detector on idx_detections_detector_time
+        detected_at = query_all("SELECT MAX(detected_at) FROM detections WHERE detector = ?", (detector,))[0][0]
+        if detected_at is not None:
+            last[detector] = detected_at
+    return last
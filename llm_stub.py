@@ -0,0 +1,50 @@
+"""
+Local stand-in for the Gemini model
+Answers offline, word by word with configurable delays, so the chatbot's streaming,
+timeout and cancellation paths can be exercised without an API key or network.
+
+Usage: EventMonitorChatbot(api_key=None, model=StubGenerativeModel())
+"""
+
+import time
+
+class _Chunk:
+    """One streamed piece of a response (mirrors the .text attribute of Gemini chunks)"""
+
+    def __init__(self, text):
+        self.text = text
+
+class StubGenerativeModel:
+    """Drop-in for genai.GenerativeModel.generate_content with canned, delayed output"""
+
+    def __init__(self, reply=None, first_token_delay=0.05, token_delay=0.01, fail_with=None):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.fail_with = fail_with
+        self.calls = 0
+
+    def _answer(self, contents):
+        if self.reply is not None:
+            return self.reply
+        # Echo the question so tests can tell answers apart
+        question = str(contents[-1]).replace("User:", "").replace("Assistant:", "").strip() if contents else ""
+        return f"(stub) You asked: {question}. All systems are being monitored."
+
+    def _stream(self, text):
+        time.sleep(self.first_token_delay)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.token_delay)
+            yield _Chunk(word if i == len(words) - 1 else word + " ")
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        self.calls += 1
+        if self.fail_with is not None:
+            raise self.fail_with
+        text = self._answer(contents)
+        if stream:
+            return self._stream(text)
+        time.sleep(self.first_token_delay + self.token_delay * len(text.split(" ")))
+        return _Chunk(text)
@@ -1,13 +1,26 @@
 import streamlit as st
 import hashlib
-import sqlite3
 import os
 from datetime import datetime, timedelta
 import cv2
 import time
+from collections import deque
 from models.fire_smoke import check_fire_smoke
-from models.crowd_surge import check_crowd_surge
+from models.crowd_surge import check_crowd_surge, count_people_per_cell
 from models.unconscious import check_unconscious
+from models.detection import detect_people, publish_detections
+from pipeline.motion_gate import MotionGate
+from pipeline.multi_camera import STAGES
+from pipeline.scheduler import DetectionScheduler
+from pipeline.capture import FrameBuffer, CaptureThread
+from pipeline.density_store import density_store, DENSITY_GRID
+from models.frames import SharedFrame, preprocess_stats
+from database import init_schema, query_one, execute
+from audit_writer import get_audit_writer
+from retention import start_retention_job
+from session_cache import session_cache, validate_session
+from detection_log import log_detection, summarize_people
+from chat_memory import CHAT_DISPLAY_LIMIT
 
 # Try to import chatbot (will work if Gemini API is configured)
 try:
@@ -132,60 +145,22 @@ st.markdown("""
 
 def init_database():
     """Initialize the database with admin user"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create sessions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            session_token TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Create audit log table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS audit_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ip_address TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+    init_schema()
+    # Hourly cleanup of old detections, audit entries and expired sessions
+    start_retention_job()
     
     # Check if admin user exists, if not create default admin
-    cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-    if not cursor.fetchone():
+    if not query_one("SELECT id FROM users WHERE username = 'admin'"):
         # Default admin credentials (change these in production!)
         default_password = "admin123"
         password_hash = hashlib.sha256(default_password.encode()).hexdigest()
         
-        cursor.execute('''
+        execute('''
             INSERT INTO users (username, password_hash, role)
             VALUES (?, ?, ?)
         ''', ('admin', password_hash, 'admin'))
         
-        conn.commit()
         st.success("Default admin user created! Username: admin, Password: admin123")
-    
-    conn.close()
 
 def hash_password(password):
     """Hash password using SHA-256"""
@@ -193,19 +168,11 @@ def hash_password(password):
 
 def verify_login(username, password):
     """Verify user login credentials"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
     password_hash = hash_password(password)
-    cursor.execute('''
+    return query_one('''
         SELECT id, username, role FROM users 
         WHERE username = ? AND password_hash = ?
     ''', (username, password_hash))
-    
-    user = cursor.fetchone()
-    conn.close()
-    
-    return user
 
 def create_session(user_id):
     """Create a new session for the user"""
@@ -213,49 +180,25 @@ def create_session(user_id):
     session_token = secrets.token_urlsafe(32)
     expires_at = datetime.now() + timedelta(hours=8)  # 8 hour session
     
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    execute('''
         INSERT INTO sessions (user_id, session_token, expires_at)
         VALUES (?, ?, ?)
     ''', (user_id, session_token, expires_at))
     
-    conn.commit()
-    conn.close()
-    
     return session_token
 
 def log_audit_event(user_id, action, ip_address="unknown"):
     """Log audit events"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO audit_log (user_id, action, ip_address)
-        VALUES (?, ?, ?)
-    ''', (user_id, action, ip_address))
-    
-    conn.commit()
-    conn.close()
+    # Queued and written in batches by a background thread so the frame loop never waits on disk
+    get_audit_writer().log(user_id, action, ip_address)
 
 def verify_session():
     """Verify if the current session is valid"""
     if not st.session_state.get('session_token'):
         return False
     
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT s.id, s.expires_at, u.username, u.role 
-        FROM sessions s 
-        JOIN users u ON s.user_id = u.id 
-        WHERE s.session_token = ? AND s.expires_at > ?
-    ''', (st.session_state.session_token, datetime.now()))
-    
-    session = cursor.fetchone()
-    conn.close()
+    # Cached for a short TTL so reruns don't hit the database every time
+    session = validate_session(st.session_state.session_token)
     
     if session:
         return True
@@ -268,14 +211,9 @@ def logout():
     """Logout user and clear session"""
     if st.session_state.get('session_token'):
         # Remove session from database
-        conn = sqlite3.connect('admin_auth.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM sessions WHERE session_token = ?', 
-                      (st.session_state.session_token,))
-        
-        conn.commit()
-        conn.close()
+        execute('DELETE FROM sessions WHERE session_token = ?', 
+                (st.session_state.session_token,))
+        session_cache.invalidate(st.session_state.session_token)
         
         # Log logout action
         if st.session_state.get('user_id'):
@@ -302,6 +240,30 @@ def is_admin():
     user_info = get_user_info()
     return user_info and user_info['role'] == 'admin'
 
+# Display names of the detection stages
+STAGE_LABELS = {
+    'fire': "🔥 Fire/Smoke",
+    'people': "🚨 Crowd + 🧍‍♂️ Unconscious"
+}
+
+def format_detection_rates(rates):
+    """Markdown summary of the scheduler's current detection rates"""
+    lines = ["### ⏱️ Detection Rates"]
+    for stage, rate in rates.items():
+        line = f"- {STAGE_LABELS.get(stage, stage)}: every {rate['interval']} frames"
+        if rate['runs_per_second'] is not None:
+            line += f" ({rate['runs_per_second']:.1f}/s)"
+        if rate['latency_ms'] is not None:
+            line += f", {rate['latency_ms']:.0f} ms"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_capture_stats(stats):
+    """Markdown summary of the capture buffer and capture-to-alert latency"""
+    return (f"### 📥 Capture\n"
+            f"- Captured: {stats['captured']} • Dropped: {stats['dropped']} • Processed: {stats['processed']}\n"
+            f"- Capture → alert latency: {stats['latency_ms']:.0f} ms")
+
 def show_chatbot_interface():
     """Show the chatbot interface"""
     st.subheader("🤖 AI Event Monitor Assistant")
@@ -319,7 +281,8 @@ def show_chatbot_interface():
     
     # Chat history
     if 'chat_history' not in st.session_state:
-        st.session_state.chat_history = []
+        # Only the latest messages are kept and re-rendered
+        st.session_state.chat_history = deque(maxlen=CHAT_DISPLAY_LIMIT)
     
     # Display chat history
     chat_container = st.container()
@@ -347,9 +310,8 @@ def show_chatbot_interface():
             'timestamp': datetime.now().strftime('%H:%M:%S')
         })
         
-        # Get response from chatbot
-        with st.spinner("🤖 Thinking..."):
-            response = st.session_state.chatbot.process_query(user_input)
+        # Stream the response from chatbot as it arrives instead of waiting for all of it
+        response = st.write_stream(st.session_state.chatbot.stream_query(user_input))
         
         # Add assistant response to history
         st.session_state.chat_history.append({
@@ -363,6 +325,10 @@ def show_chatbot_interface():
     # Quick action buttons
     st.markdown("---")
     st.subheader("🚀 Quick Actions")
+    router_stats = st.session_state.chatbot.router_stats()
+    cache_stats = st.session_state.chatbot.response_cache.stats()
+    st.caption(f"🧭 Answered locally: {router_stats['routed']} of {router_stats['routed'] + router_stats['escalated']} questions ({router_stats['hit_rate']:.0%}) • "
+               f"⚡ Cached Gemini answers: {cache_stats['hits']} of {cache_stats['hits'] + cache_stats['misses']} ({cache_stats['hit_rate']:.0%})")
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -378,15 +344,15 @@ def show_chatbot_interface():
     
     with col3:
         if st.button("🗑️ Clear Chat"):
-            st.session_state.chat_history = []
+            st.session_state.chat_history.clear()
             st.session_state.chatbot.clear_chat_history()
             st.rerun()
     
     with col4:
         if st.button("🔧 API Status"):
             try:
-                # Test API connection
-                test_response = st.session_state.chatbot.process_query("Hello, are you working?")
+                # Test API connection (a cached answer would not prove Gemini is reachable)
+                test_response = st.session_state.chatbot.process_query("Hello, are you working?", use_cache=False)
                 st.success("✅ Gemini API is working!")
             except Exception as e:
                 st.error(f"❌ API Error: {str(e)}")
@@ -415,8 +381,8 @@ def show_chatbot_interface():
                     'timestamp': datetime.now().strftime('%H:%M:%S')
                 })
                 
-                with st.spinner("🤖 Thinking..."):
-                    response = st.session_state.chatbot.process_query(example)
+                # Stream the answer as it arrives instead of waiting for all of it
+                response = st.write_stream(st.session_state.chatbot.stream_query(example))
                 
                 st.session_state.chat_history.append({
                     'role': 'assistant',
@@ -577,7 +543,15 @@ def show_dashboard():
             # Detection sensitivity
             st.subheader("🔧 Detection Settings")
             fire_threshold = st.slider("Fire Detection Sensitivity", 1000, 5000, 2000)
+            fast_fire = st.checkbox("⚡ Fast Fire Detection", value=False,
+                                    help="Check fire/smoke on a 250x150 image; about 4x cheaper with the same result on almost every frame")
             crowd_threshold = st.slider("Crowd Surge Threshold", 1, 10, 5)
+            motion_threshold = st.slider("Motion Threshold", 0.0, 0.05, 0.002, 0.001, format="%.3f",
+                                         help="Fraction of the image that must change; frames below it are skipped and keep their previous verdicts")
+            max_skip_interval = st.slider("Max Skip Interval (s)", 1, 60, 10,
+                                          help="Force a full re-evaluation at least this often")
+            target_latency_ms = st.slider("Target Frame Latency (ms)", 30, 500, 100,
+                                          help="Detection rates adapt so each frame stays within this budget")
             
             # Start/Stop button
             if 'monitoring_active' not in st.session_state:
@@ -611,7 +585,8 @@ def show_dashboard():
             
             # Chat history
             if 'chat_history' not in st.session_state:
-                st.session_state.chat_history = []
+                # Only the latest messages are kept and re-rendered
+                st.session_state.chat_history = deque(maxlen=CHAT_DISPLAY_LIMIT)
             
             # Display chat history
             for message in st.session_state.chat_history:
@@ -632,9 +607,8 @@ def show_dashboard():
                         'timestamp': datetime.now().strftime('%H:%M:%S')
                     })
                     
-                    # Get response from chatbot
-                    with st.spinner("🤖 Thinking..."):
-                        response = st.session_state.chatbot.process_query(user_input)
+                    # Stream the response from chatbot as it arrives instead of waiting for all of it
+                    response = st.write_stream(st.session_state.chatbot.stream_query(user_input))
                     
                     # Add assistant response to history
                     st.session_state.chat_history.append({
@@ -657,7 +631,7 @@ def show_dashboard():
                     st.json(history)
             with col3:
                 if st.button("🗑️ Clear Chat"):
-                    st.session_state.chat_history = []
+                    st.session_state.chat_history.clear()
                     st.session_state.chatbot.clear_chat_history()
                     st.rerun()
             
@@ -678,8 +652,8 @@ def show_dashboard():
                         'timestamp': datetime.now().strftime('%H:%M:%S')
                     })
                     
-                    with st.spinner("🤖 Thinking..."):
-                        response = st.session_state.chatbot.process_query(example)
+                    # Stream the answer as it arrives instead of waiting for all of it
+                    response = st.write_stream(st.session_state.chatbot.stream_query(example))
                     
                     st.session_state.chat_history.append({
                         'role': 'assistant',
@@ -713,6 +687,8 @@ def show_dashboard():
             with col2:
                 st.subheader("🚨 Alert Panel")
                 alert_placeholder = st.empty()
+                rates_placeholder = st.empty()
+                capture_placeholder = st.empty()
                 
                 # Admin features
                 if is_admin():
@@ -735,121 +711,175 @@ def show_dashboard():
             """Main monitoring loop with all three detection systems"""
             camera_index = get_camera_index(camera_source)
             cap = cv2.VideoCapture(camera_index)
-            
-            if not cap.isOpened():
-                st.error(f"❌ Could not access camera {camera_index}. Please check your camera connection.")
-                return
-            
-            st.success(f"📷 Camera {camera_index} started successfully!")
-            log_audit_event(user_info['user_id'], f"camera_started_index_{camera_index}")
-            
-            # Initialize alert counters
-            if 'alert_counts' not in st.session_state:
-                st.session_state.alert_counts = {
-                    'fire': 0,
-                    'crowd': 0,
-                    'unconscious': 0
-                }
-            
-            frame_count = 0
-            start_time = time.time()
-            
-            while st.session_state.monitoring_active:
-                ret, frame = cap.read()
-                if not ret:
-                    st.warning("⚠️ Failed to read frame from camera.")
-                    break
+            capture_thread = None
+            try:
                 
-                frame_count += 1
+                if not cap.isOpened():
+                    st.error(f"❌ Could not access camera {camera_index}. Please check your camera connection.")
+                    return
                 
-                # Resize frame for display
-                display_frame = cv2.resize(frame, (720, 480))
+                st.success(f"📷 Camera {camera_index} started successfully!")
+                log_audit_event(user_info['user_id'], f"camera_started_index_{camera_index}")
                 
-                # Run detection models (every 5 frames to improve performance)
-                if frame_count % 5 == 0:
-                    try:
-                        # Run detections in parallel for better performance
-                        fire_detected = check_fire_smoke(frame)
-                        crowd_detected = check_crowd_surge(frame)
-                        unconscious_detected = check_unconscious(frame)
-                        
-                        # Update alert counts
-                        if fire_detected:
-                            st.session_state.alert_counts['fire'] += 1
-                            log_audit_event(user_info['user_id'], "fire_alert_detected")
-                        if crowd_detected:
-                            st.session_state.alert_counts['crowd'] += 1
-                            log_audit_event(user_info['user_id'], "crowd_surge_alert_detected")
-                        if unconscious_detected:
-                            st.session_state.alert_counts['unconscious'] += 1
-                            log_audit_event(user_info['user_id'], "unconscious_person_alert_detected")
-                        
-                        # Update status indicators
-                        fire_status.markdown(f"""
-                        <div class="alert-box {'alert-danger' if fire_detected else 'alert-success'}">
-                            <span class="status-indicator {'status-active' if fire_detected else 'status-inactive'}"></span>
-                            🔥 Fire/Smoke<br>
-                            {'🟥 ALERT DETECTED' if fire_detected else '🟩 All Clear'}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        crowd_status.markdown(f"""
-                        <div class="alert-box {'alert-danger' if crowd_detected else 'alert-success'}">
-                            <span class="status-indicator {'status-active' if crowd_detected else 'status-inactive'}"></span>
-                            🚨 Crowd Surge<br>
-                            {'🟥 ALERT DETECTED' if crowd_detected else '🟩 All Clear'}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        unconscious_status.markdown(f"""
-                        <div class="alert-box {'alert-danger' if unconscious_detected else 'alert-success'}">
-                            <span class="status-indicator {'status-active' if unconscious_detected else 'status-inactive'}"></span>
-                            🧍‍♂️ Unconscious<br>
-                            {'🟥 ALERT DETECTED' if unconscious_detected else '🟩 All Clear'}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        # Update alert panel
-                        alerts = []
-                        if fire_detected:
-                            alerts.append("🔥 **FIRE/SMOKE DETECTED** - Immediate evacuation required!")
-                        if crowd_detected:
-                            alerts.append("🚨 **CROWD SURGE DETECTED** - Crowd control needed!")
-                        if unconscious_detected:
-                            alerts.append("🧍‍♂️ **UNCONSCIOUS PERSON DETECTED** - Medical attention required!")
-                        
-                        if alerts:
-                            alert_placeholder.markdown("### 🚨 ACTIVE ALERTS\n" + "\n\n".join(alerts))
-                        else:
-                            alert_placeholder.markdown("### ✅ All Systems Normal\nNo alerts detected.")
-                        
-                    except Exception as e:
-                        st.error(f"Error in detection models: {e}")
-                        log_audit_event(user_info['user_id'], f"detection_error: {str(e)}")
+                # Capture runs in its own thread so slow detection never backs up the camera
+                frame_buffer = FrameBuffer()
+                capture_thread = CaptureThread(cap, frame_buffer)
+                capture_thread.start()
                 
-                # Add monitoring overlay to frame
-                cv2.putText(display_frame, "AI Monitoring Active", (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                # Initialize alert counters
+                if 'alert_counts' not in st.session_state:
+                    st.session_state.alert_counts = {
+                        'fire': 0,
+                        'crowd': 0,
+                        'unconscious': 0
+                    }
                 
-                # Add user info overlay
-                if user_info:
-                    cv2.putText(display_frame, f"User: {user_info['username']}", (10, 60),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                frame_count = 0
+                start_time = time.time()
                 
-                # Calculate and display FPS
-                elapsed_time = time.time() - start_time
-                if elapsed_time > 0:
-                    fps = frame_count / elapsed_time
-                    cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 90),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                # Skip detector work while the scene is static
+                motion_gates = {stage: MotionGate(motion_threshold, max_skip_interval) for stage in STAGES}
                 
-                # Display the frame
-                video_placeholder.image(display_frame, channels="BGR", use_container_width=True)
+                # Per-stage sampling adapts to measured detector latency
+                scheduler = DetectionScheduler(STAGES, target_latency=target_latency_ms / 1000,
+                                               min_intervals={'fire': 2, 'people': 2})
+                fire_detected = crowd_detected = unconscious_detected = False
                 
-                # Small delay to control frame rate
-                time.sleep(0.03)  # ~30 FPS
+                while st.session_state.monitoring_active:
+                    frame_start = time.perf_counter()
+                    detection_time = 0.0
+                    item = frame_buffer.latest(timeout=1.0)
+                    if item is None:
+                        st.warning("⚠️ Failed to read frame from camera.")
+                        break
+                    frame, captured_at = item
+                    # Read-only and shared by all detectors, derived resizes are cached on it
+                    frame = SharedFrame(frame)
+                    
+                    frame_count += 1
+                    
+                    # Resize frame for display
+                    display_frame = cv2.resize(frame, (720, 480))
+                    
+                    # Run the detection stages that are due on this frame;
+                    # unchanged frames keep the previous verdicts on screen
+                    due_stages = [stage for stage in scheduler.due(frame_count)
+                                  if motion_gates[stage].should_process(frame)]
+                    if due_stages:
+                        try:
+                            if 'fire' in due_stages:
+                                stage_start = time.perf_counter()
+                                fire_detected = check_fire_smoke(frame, fast_fire)
+                                stage_time = time.perf_counter() - stage_start
+                                scheduler.record('fire', stage_time, frame_count)
+                                detection_time += stage_time
+                                
+                                if fire_detected:
+                                    st.session_state.alert_counts['fire'] += 1
+                                    log_detection(camera_index, 'fire', user_id=user_info['user_id'], detected_at=captured_at)
+                            
+                            if 'people' in due_stages:
+                                # Run YOLO once and share the person boxes between detectors
+                                stage_start = time.perf_counter()
+                                detections = detect_people(frame)
+                                # Let the chatbot answer crowd questions from these boxes
+                                publish_detections(camera_index, detections, captured_at)
+                                if detections is not None:
+                                    density_store.record(camera_index, count_people_per_cell(detections, frame.shape, *DENSITY_GRID), captured_at)
+                                crowd_detected = check_crowd_surge(frame, detections)
+                                unconscious_detected = check_unconscious(frame, detections)
+                                stage_time = time.perf_counter() - stage_start
+                                scheduler.record('people', stage_time, frame_count)
+                                detection_time += stage_time
+                                
+                                if crowd_detected or unconscious_detected:
+                                    score, count, bbox = summarize_people(detections)
+                                if crowd_detected:
+                                    st.session_state.alert_counts['crowd'] += 1
+                                    log_detection(camera_index, 'crowd', score, count, bbox, user_info['user_id'], captured_at)
+                                if unconscious_detected:
+                                    st.session_state.alert_counts['unconscious'] += 1
+                                    log_detection(camera_index, 'unconscious', score, count, bbox, user_info['user_id'], captured_at)
+                            
+                            # Update status indicators
+                            fire_status.markdown(f"""
+                            <div class="alert-box {'alert-danger' if fire_detected else 'alert-success'}">
+                                <span class="status-indicator {'status-active' if fire_detected else 'status-inactive'}"></span>
+                                🔥 Fire/Smoke<br>
+                                {'🟥 ALERT DETECTED' if fire_detected else '🟩 All Clear'}
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            crowd_status.markdown(f"""
+                            <div class="alert-box {'alert-danger' if crowd_detected else 'alert-success'}">
+                                <span class="status-indicator {'status-active' if crowd_detected else 'status-inactive'}"></span>
+                                🚨 Crowd Surge<br>
+                                {'🟥 ALERT DETECTED' if crowd_detected else '🟩 All Clear'}
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            unconscious_status.markdown(f"""
+                            <div class="alert-box {'alert-danger' if unconscious_detected else 'alert-success'}">
+                                <span class="status-indicator {'status-active' if unconscious_detected else 'status-inactive'}"></span>
+                                🧍‍♂️ Unconscious<br>
+                                {'🟥 ALERT DETECTED' if unconscious_detected else '🟩 All Clear'}
+                            </div>
+                            """, unsafe_allow_html=True)
+                            
+                            # Update alert panel
+                            alerts = []
+                            if fire_detected:
+                                alerts.append("🔥 **FIRE/SMOKE DETECTED** - Immediate evacuation required!")
+                            if crowd_detected:
+                                alerts.append("🚨 **CROWD SURGE DETECTED** - Crowd control needed!")
+                            if unconscious_detected:
+                                alerts.append("🧍‍♂️ **UNCONSCIOUS PERSON DETECTED** - Medical attention required!")
+                            
+                            if alerts:
+                                alert_placeholder.markdown("### 🚨 ACTIVE ALERTS\n" + "\n\n".join(alerts))
+                            else:
+                                alert_placeholder.markdown("### ✅ All Systems Normal\nNo alerts detected.")
+                            
+                            elapsed_time = time.time() - start_time
+                            st.session_state.detection_rates = scheduler.rates(frame_count / elapsed_time if elapsed_time > 0 else None)
+                            rates_placeholder.markdown(format_detection_rates(st.session_state.detection_rates))
+                            
+                            st.session_state.capture_stats = frame_buffer.stats()
+                            st.session_state.capture_stats['latency_ms'] = (time.time() - captured_at) * 1000
+                            capture_placeholder.markdown(format_capture_stats(st.session_state.capture_stats))
+                            
+                        except Exception as e:
+                            st.error(f"Error in detection models: {e}")
+                            log_audit_event(user_info['user_id'], f"detection_error: {str(e)}")
+                    
+                    # Add monitoring overlay to frame
+                    cv2.putText(display_frame, "AI Monitoring Active", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                    
+                    # Add user info overlay
+                    if user_info:
+                        cv2.putText(display_frame, f"User: {user_info['username']}", (10, 60),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    
+                    # Calculate and display FPS
+                    elapsed_time = time.time() - start_time
+                    if elapsed_time > 0:
+                        fps = frame_count / elapsed_time
+                        cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 90),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+                    
+                    # Display the frame
+                    video_placeholder.image(display_frame, channels="BGR", use_container_width=True)
+                    
+                    # Everything except detection counts against the scheduler's budget
+                    scheduler.record_overhead(max(0.0, time.perf_counter() - frame_start - detection_time))
             
-            cap.release()
+            finally:
+                # Streamlit ends a running script with an exception at the next st.* call (Stop or
+                # any rerun), so the capture thread and camera are released here
+                if capture_thread is not None:
+                    capture_thread.stop()
+                cap.release()
             log_audit_event(user_info['user_id'], "monitoring_stopped")
         
         # Start monitoring if active
@@ -873,6 +903,46 @@ def show_dashboard():
             with col3:
                 st.metric("Unconscious Person Alerts", st.session_state.alert_counts['unconscious'])
         
+        if 'capture_stats' in st.session_state:
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                st.metric("Frames Captured", st.session_state.capture_stats['captured'])
+            with col2:
+                st.metric("Frames Dropped", st.session_state.capture_stats['dropped'])
+            with col3:
+                st.metric("Frames Processed", st.session_state.capture_stats['processed'])
+            with col4:
+                st.metric("Capture → Alert Latency", f"{st.session_state.capture_stats['latency_ms']:.0f} ms")
+        
+        audit_stats = get_audit_writer().stats()
+        if audit_stats['written'] or audit_stats['queued'] or audit_stats['dropped']:
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Audit Events Queued", audit_stats['queued'])
+            with col2:
+                st.metric("Audit Events Written", audit_stats['written'])
+            with col3:
+                st.metric("Audit Events Dropped", audit_stats['dropped'])
+        
+        if 'detection_rates' in st.session_state:
+            rate_columns = st.columns(len(st.session_state.detection_rates))
+            for column, (stage, rate) in zip(rate_columns, st.session_state.detection_rates.items()):
+                with column:
+                    latency = f"{rate['latency_ms']:.0f} ms" if rate['latency_ms'] is not None else None
+                    st.metric(f"{STAGE_LABELS.get(stage, stage)} Interval", f"every {rate['interval']} frames", latency, delta_color="off")
+        
+        preprocess_cache = preprocess_stats.snapshot()
+        if preprocess_cache:
+            st.subheader("🧩 Preprocessing Cache")
+            st.dataframe([{
+                "Transform": name,
+                "Hits": counts['hits'],
+                "Misses": counts['misses'],
+                "Hit Rate": f"{counts['hits'] / (counts['hits'] + counts['misses']):.0%}"
+            } for name, counts in preprocess_cache.items()], use_container_width=True)
+        
         # Log page access
         log_audit_event(user_info['user_id'], "dashboard_accessed")
     
@@ -1,13 +1,19 @@
 import streamlit as st
+import os
 import cv2
 import time
 import threading
 from queue import Queue
 from concurrent.futures import ThreadPoolExecutor
-from models.fire_smoke import check_fire_smoke
-from models.crowd_surge import check_crowd_surge
-from models.unconscious import check_unconscious
+from pipeline.multi_camera import MultiCameraEngine, STAGES
+from pipeline.scheduler import DetectionScheduler
+from pipeline.process_pool import ProcessDetectionBackend
+from pipeline.density_store import density_store, direction_counts
+from models.frames import preprocess_stats
 from auth_utils import require_auth, log_user_action, logout, get_user_info, is_admin
+from audit_writer import get_audit_writer
+from detection_log import log_detection, summarize_people
+from models.detection import latest_detections
 
 # Require authentication
 #require_auth()
@@ -128,16 +134,30 @@ with st.sidebar:
     
     # Camera selection
     st.subheader("📷 Camera Settings")
-    camera_source = st.selectbox(
-        "Camera Source",
+    camera_sources = st.multiselect(
+        "Camera Sources",
         ["Webcam (0)", "Webcam (1)", "Webcam (2)"],
-        index=0
+        default=["Webcam (0)"]
     )
     
     # Detection sensitivity
     st.subheader("🔧 Detection Settings")
     fire_threshold = st.slider("Fire Detection Sensitivity", 1000, 5000, 2000)
+    fast_fire = st.checkbox("⚡ Fast Fire Detection", value=False,
+                            help="Check fire/smoke on a 250x150 image; about 4x cheaper with the same result on almost every frame")
     crowd_threshold = st.slider("Crowd Surge Threshold", 1, 10, 5)
+    motion_threshold = st.slider("Motion Threshold", 0.0, 0.05, 0.002, 0.001, format="%.3f",
+                                 help="Fraction of the image that must change; frames below it are skipped and keep their previous verdicts")
+    max_skip_interval = st.slider("Max Skip Interval (s)", 1, 60, 10,
+                                  help="Force a full re-evaluation at least this often")
+    target_latency_ms = st.slider("Target Frame Latency (ms)", 30, 500, 100,
+                                  help="Detection rates adapt so each frame stays within this budget")
+    detection_backend = st.selectbox(
+        "Detection Backend",
+        ["Threads", "Processes"],
+        index=0,
+        help="Processes run each camera's detectors in its own worker to use all CPU cores"
+    )
     
     # Start/Stop button
     if 'monitoring_active' not in st.session_state:
@@ -171,6 +191,8 @@ with col1:
 with col2:
     st.subheader("🚨 Alert Panel")
     alert_placeholder = st.empty()
+    rates_placeholder = st.empty()
+    capture_placeholder = st.empty()
     
     # Admin features
     if is_admin():
@@ -190,157 +212,229 @@ import threading
 from queue import Queue
 from concurrent.futures import ThreadPoolExecutor
 
-def process_frame_with_model(frame, model_func):
-    """Helper function to run a detection model on a frame"""
-    try:
-        return model_func(frame)
-    except Exception as e:
-        st.error(f"Error in {model_func.__name__}: {str(e)}")
-        return False
+# Display names of the detection stages
+STAGE_LABELS = {
+    'fire': "🔥 Fire/Smoke",
+    'people': "🚨 Crowd + 🧍‍♂️ Unconscious"
+}
+
+def format_detection_rates(rates):
+    """Markdown summary of the scheduler's current detection rates"""
+    lines = ["### ⏱️ Detection Rates"]
+    for stage, rate in rates.items():
+        line = f"- {STAGE_LABELS.get(stage, stage)}: every {rate['interval']} frames"
+        if rate['runs_per_second'] is not None:
+            line += f" ({rate['runs_per_second']:.1f}/s)"
+        if rate['latency_ms'] is not None:
+            line += f", {rate['latency_ms']:.0f} ms"
+        lines.append(line)
+    return "\n".join(lines)
+
+def format_capture_stats(stats):
+    """Markdown summary of the capture buffers and capture-to-alert latency"""
+    return (f"### 📥 Capture\n"
+            f"- Captured: {stats['captured']} • Dropped: {stats['dropped']} • Processed: {stats['processed']}\n"
+            f"- Capture → alert latency: {stats['latency_ms']:.0f} ms")
 
 # Initialize camera
 def get_camera_index(source_text):
     return int(source_text.split("(")[1].split(")")[0])
 
 def main_monitoring_loop():
-    camera_index = get_camera_index(camera_source)
-    cap = cv2.VideoCapture(camera_index)
-    
-    if not cap.isOpened():
-        st.error(f"❌ Could not access camera {camera_index}. Please check your camera connection.")
+    camera_indices = [get_camera_index(source) for source in camera_sources]
+    if not camera_indices:
+        st.warning("⚠️ Please select at least one camera source.")
         return
     
-    st.success(f"📷 Camera {camera_index} started successfully!")
-    log_user_action(f"camera_started_index_{camera_index}")
-    
-    # Initialize alert counters
-    if 'alert_counts' not in st.session_state:
-        st.session_state.alert_counts = {
-            'fire': 0,
-            'crowd': 0,
-            'unconscious': 0
-        }
-    
-    frame_count = 0
-    start_time = time.time()
-    
-    # Create thread pool for parallel processing
-    with ThreadPoolExecutor(max_workers=3) as executor:
-        while st.session_state.monitoring_active:
-            ret, frame = cap.read()
-            if not ret:
-                st.warning("⚠️ Failed to read frame from camera.")
-                break
-            
-            frame_count += 1
-            
-            # Resize frame for display
-            display_frame = cv2.resize(frame, (720, 480))
-            
-            # Run detection models (every 5 frames to improve performance)
-            if frame_count % 5 == 0:
-                try:
-                    # Run all detections in parallel using thread pool
-                    future_fire = executor.submit(process_frame_with_model, frame.copy(), check_fire_smoke)
-                    future_crowd = executor.submit(process_frame_with_model, frame.copy(), check_crowd_surge)
-                    future_unconscious = executor.submit(process_frame_with_model, frame.copy(), check_unconscious)
-                    
-                    # Wait for all detections to complete
-                    fire_detected = future_fire.result()
-                    crowd_detected = future_crowd.result()
-                    unconscious_detected = future_unconscious.result()
-                    
-                    # Update alert counts
-                    if fire_detected:
-                        st.session_state.alert_counts['fire'] += 1
-                        log_user_action("fire_alert_detected")
-                    if crowd_detected:
-                        st.session_state.alert_counts['crowd'] += 1
-                        log_user_action("crowd_surge_alert_detected")
-                    if unconscious_detected:
-                        st.session_state.alert_counts['unconscious'] += 1
-                        log_user_action("unconscious_person_alert_detected")
-                    
-                    # Update quadrant data if crowd detected
-                    if crowd_detected:
-                        # Divide frame into quadrants and analyze crowd density
-                        height, width = frame.shape[:2]
-                        mid_x, mid_y = width // 2, height // 2
+    backend = engine = None
+    try:
+        # Created inside try so the worker pool and shared memory are freed however the run ends
+        backend = ProcessDetectionBackend(min(len(camera_indices), os.cpu_count() or 1)) if detection_backend == "Processes" else None
+        engine = MultiCameraEngine(camera_indices, motion_threshold=motion_threshold, max_interval=max_skip_interval,
+                                   backend=backend, fast_fire=fast_fire)
+        opened_cameras = engine.open()
+        
+        if not opened_cameras:
+            st.error(f"❌ Could not access cameras {camera_indices}. Please check your camera connection.")
+            return
+        
+        st.success(f"📷 Cameras {', '.join(map(str, opened_cameras))} started successfully!")
+        for camera_index in opened_cameras:
+            log_user_action(f"camera_started_index_{camera_index}")
+        
+        # Initialize alert counters
+        if 'alert_counts' not in st.session_state:
+            st.session_state.alert_counts = {
+                'fire': 0,
+                'crowd': 0,
+                'unconscious': 0
+            }
+        
+        # One video feed per camera
+        feed_columns = video_placeholder.container().columns(len(opened_cameras))
+        camera_feeds = {camera: column.empty() for camera, column in zip(opened_cameras, feed_columns)}
+        
+        # Per-stage sampling adapts to measured detector latency
+        scheduler = DetectionScheduler(STAGES, target_latency=target_latency_ms / 1000,
+                                       min_intervals={'fire': 2, 'people': 2})
+        
+        frame_count = 0
+        start_time = time.time()
+        
+        # Thread pool runs the fire checks while YOLO processes the camera batch
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            engine.executor = executor
+            while st.session_state.monitoring_active:
+                frame_start = time.perf_counter()
+                detection_time = 0.0
+                frames = engine.read_frames()
+                if not frames:
+                    st.warning("⚠️ Failed to read frames from cameras.")
+                    break
+                
+                frame_count += 1
+                
+                # Run the detection stages that are due on this frame
+                due_stages = scheduler.due(frame_count)
+                if due_stages:
+                    try:
+                        # One batched YOLO pass for all cameras whose scene changed
+                        results = engine.process(frames, due_stages)
+                        for stage, seconds in engine.last_timings.items():
+                            scheduler.record(stage, seconds, frame_count)
+                            detection_time += seconds
                         
-                        # Example: Calculate crowd density per quadrant
-                        # Replace this with your actual crowd density calculation logic
-                        st.session_state.crowd_density_quadrants = {
-                            "Northeast": crowd_detected and random.randint(0, 30),
-                            "Northwest": crowd_detected and random.randint(0, 30),
-                            "Southeast": crowd_detected and random.randint(0, 30),
-                            "Southwest": crowd_detected and random.randint(0, 30)
-                        }
-                    
-                    # Update status indicators
-                    fire_status.markdown(f"""
-                    <div class="alert-box {'alert-danger' if fire_detected else 'alert-success'}">
-                        <span class="status-indicator {'status-active' if fire_detected else 'status-inactive'}"></span>
-                        🔥 Fire/Smoke<br>
-                        {'🟥 ALERT DETECTED' if fire_detected else '🟩 All Clear'}
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    crowd_status.markdown(f"""
-                    <div class="alert-box {'alert-danger' if crowd_detected else 'alert-success'}">
-                        <span class="status-indicator {'status-active' if crowd_detected else 'status-inactive'}"></span>
-                        🚨 Crowd Surge<br>
-                        {'🟥 ALERT DETECTED' if crowd_detected else '🟩 All Clear'}
-                    </div>
-                    """, unsafe_allow_html=True)
+                        # Age of the oldest frame that was just evaluated
+                        if results:
+                            capture_latency = time.time() - min(engine.capture_times[camera] for camera in results)
+                            camera_stats = engine.capture_stats().values()
+                            st.session_state.capture_stats = {
+                                'captured': sum(stats['captured'] for stats in camera_stats),
+                                'dropped': sum(stats['dropped'] for stats in camera_stats),
+                                'processed': sum(stats['processed'] for stats in camera_stats),
+                                'latency_ms': capture_latency * 1000
+                            }
+                            capture_placeholder.markdown(format_capture_stats(st.session_state.capture_stats))
+                        
+                        # Static cameras keep showing their previous verdicts
+                        latest_results = engine.latest_results
+                        fire_cameras = [camera for camera, result in latest_results.items() if result['fire']]
+                        crowd_cameras = [camera for camera, result in latest_results.items() if result['crowd']]
+                        unconscious_cameras = [camera for camera, result in latest_results.items() if result['unconscious']]
+                        
+                        fire_detected = bool(fire_cameras)
+                        crowd_detected = bool(crowd_cameras)
+                        unconscious_detected = bool(unconscious_cameras)
+                        
+                        # Update alert counts for freshly evaluated cameras only
+                        user_id = st.session_state.get('user_id')
+                        for camera, result in results.items():
+                            captured_at = engine.capture_times.get(camera)
+                            if result.get('fire'):
+                                st.session_state.alert_counts['fire'] += 1
+                                log_detection(camera, 'fire', user_id=user_id, detected_at=captured_at)
+                            if result.get('crowd') or result.get('unconscious'):
+                                latest = latest_detections(camera)
+                                score, count, bbox = summarize_people(latest[0] if latest else None)
+                            if result.get('crowd'):
+                                st.session_state.alert_counts['crowd'] += 1
+                                log_detection(camera, 'crowd', score, count, bbox, user_id, captured_at)
+                            if result.get('unconscious'):
+                                st.session_state.alert_counts['unconscious'] += 1
+                                log_detection(camera, 'unconscious', score, count, bbox, user_id, captured_at)
+                        
+                        # People per quadrant from the density store, summed over cameras
+                        quadrants = {"Northeast": 0, "Northwest": 0, "Southeast": 0, "Southwest": 0}
+                        for camera in density_store.cameras():
+                            latest = density_store.latest(camera)
+                            if latest is not None:
+                                for direction, count in direction_counts(latest[1]).items():
+                                    if direction.capitalize() in quadrants:
+                                        quadrants[direction.capitalize()] += int(count)
+                        st.session_state.crowd_density_quadrants = quadrants
+                        
+                        # Update status indicators
+                        fire_status.markdown(f"""
+                        <div class="alert-box {'alert-danger' if fire_detected else 'alert-success'}">
+                            <span class="status-indicator {'status-active' if fire_detected else 'status-inactive'}"></span>
+                            🔥 Fire/Smoke<br>
+                            {'🟥 ALERT DETECTED' if fire_detected else '🟩 All Clear'}
+                        </div>
+                        """, unsafe_allow_html=True)
+                        
+                        crowd_status.markdown(f"""
+                        <div class="alert-box {'alert-danger' if crowd_detected else 'alert-success'}">
+                            <span class="status-indicator {'status-active' if crowd_detected else 'status-inactive'}"></span>
+                            🚨 Crowd Surge<br>
+                            {'🟥 ALERT DETECTED' if crowd_detected else '🟩 All Clear'}
+                        </div>
+                        """, unsafe_allow_html=True)
+                        
+                        unconscious_status.markdown(f"""
+                        <div class="alert-box {'alert-danger' if unconscious_detected else 'alert-success'}">
+                            <span class="status-indicator {'status-active' if unconscious_detected else 'status-inactive'}"></span>
+                            🧍‍♂️ Unconscious<br>
+                            {'🟥 ALERT DETECTED' if unconscious_detected else '🟩 All Clear'}
+                        </div>
+                        """, unsafe_allow_html=True)
+                        
+                        # Update alert panel
+                        alerts = []
+                        if fire_detected:
+                            alerts.append(f"🔥 **FIRE/SMOKE DETECTED** (camera {', '.join(map(str, fire_cameras))}) - Immediate evacuation required!")
+                        if crowd_detected:
+                            alerts.append(f"🚨 **CROWD SURGE DETECTED** (camera {', '.join(map(str, crowd_cameras))}) - Crowd control needed!")
+                        if unconscious_detected:
+                            alerts.append(f"🧍‍♂️ **UNCONSCIOUS PERSON DETECTED** (camera {', '.join(map(str, unconscious_cameras))}) - Medical attention required!")
+                        
+                        if alerts:
+                            alert_placeholder.markdown("### 🚨 ACTIVE ALERTS\n" + "\n\n".join(alerts))
+                        else:
+                            alert_placeholder.markdown("### ✅ All Systems Normal\nNo alerts detected.")
+                        
+                        if engine.last_timings:
+                            elapsed_time = time.time() - start_time
+                            st.session_state.detection_rates = scheduler.rates(frame_count / elapsed_time if elapsed_time > 0 else None)
+                            rates_placeholder.markdown(format_detection_rates(st.session_state.detection_rates))
+                        
+                    except Exception as e:
+                        st.error(f"Error in detection models: {str(e)}")
+                
+                # Calculate FPS
+                elapsed_time = time.time() - start_time
+                fps = frame_count / elapsed_time if elapsed_time > 0 else 0
+                
+                for camera, frame in frames.items():
+                    # Resize frame for display
+                    display_frame = cv2.resize(frame, (720, 480))
                     
-                    unconscious_status.markdown(f"""
-                    <div class="alert-box {'alert-danger' if unconscious_detected else 'alert-success'}">
-                        <span class="status-indicator {'status-active' if unconscious_detected else 'status-inactive'}"></span>
-                        🧍‍♂️ Unconscious<br>
-                        {'🟥 ALERT DETECTED' if unconscious_detected else '🟩 All Clear'}
-                    </div>
-                    """, unsafe_allow_html=True)
+                    # Add monitoring overlay to frame
+                    cv2.putText(display_frame, f"AI Monitoring Active - Camera {camera}", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
                     
-                    # Update alert panel
-                    alerts = []
-                    if fire_detected:
-                        alerts.append("🔥 **FIRE/SMOKE DETECTED** - Immediate evacuation required!")
-                    if crowd_detected:
-                        alerts.append("🚨 **CROWD SURGE DETECTED** - Crowd control needed!")
-                    if unconscious_detected:
-                        alerts.append("🧍‍♂️ **UNCONSCIOUS PERSON DETECTED** - Medical attention required!")
+                    # Add user info overlay
+                    if user_info:
+                        cv2.putText(display_frame, f"User: {user_info['username']}", (10, 60),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
                     
-                    if alerts:
-                        alert_placeholder.markdown("### 🚨 ACTIVE ALERTS\n" + "\n\n".join(alerts))
-                    else:
-                        alert_placeholder.markdown("### ✅ All Systems Normal\nNo alerts detected.")
+                    # Display FPS
+                    if fps > 0:
+                        cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 90),
+                                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
                     
-                except Exception as e:
-                    st.error(f"Error in detection models: {str(e)}")
-            
-            # Add monitoring overlay to frame
-            cv2.putText(display_frame, "AI Monitoring Active", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            
-            # Add user info overlay
-            if user_info:
-                cv2.putText(display_frame, f"User: {user_info['username']}", (10, 60),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Calculate and display FPS
-            elapsed_time = time.time() - start_time
-            if elapsed_time > 0:
-                fps = frame_count / elapsed_time
-                cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 90),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-            
-            # Display the frame
-            video_placeholder.image(display_frame, channels="BGR", use_column_width=True)
-            
-            # Small delay to control frame rate
-            time.sleep(0.03)  # ~30 FPS
+                    # Display the frame
+                    camera_feeds[camera].image(display_frame, channels="BGR", use_column_width=True)
+                
+                # Everything except detection counts against the scheduler's budget
+                scheduler.record_overhead(max(0.0, time.perf_counter() - frame_start - detection_time))
     
-    cap.release()
+    finally:
+        # Streamlit ends a running script with an exception at the next st.* call (Stop or
+        # any rerun), so the cameras, capture threads and backend are released here
+        if engine is not None:
+            engine.release()
+        elif backend is not None:
+            backend.close()
     log_user_action("monitoring_stopped")
 
 # Start monitoring if active
@@ -364,5 +458,65 @@ if 'alert_counts' in st.session_state:
     with col3:
         st.metric("Unconscious Person Alerts", st.session_state.alert_counts['unconscious'])
 
+if 'capture_stats' in st.session_state:
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Frames Captured", st.session_state.capture_stats['captured'])
+    with col2:
+        st.metric("Frames Dropped", st.session_state.capture_stats['dropped'])
+    with col3:
+        st.metric("Frames Processed", st.session_state.capture_stats['processed'])
+    with col4:
+        st.metric("Capture → Alert Latency", f"{st.session_state.capture_stats['latency_ms']:.0f} ms")
+
+if 'detection_rates' in st.session_state:
+    rate_columns = st.columns(len(st.session_state.detection_rates))
+    for column, (stage, rate) in zip(rate_columns, st.session_state.detection_rates.items()):
+        with column:
+            latency = f"{rate['latency_ms']:.0f} ms" if rate['latency_ms'] is not None else None
+            st.metric(f"{STAGE_LABELS.get(stage, stage)} Interval", f"every {rate['interval']} frames", latency, delta_color="off")
+
+audit_stats = get_audit_writer().stats()
+if audit_stats['written'] or audit_stats['queued'] or audit_stats['dropped']:
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Audit Events Queued", audit_stats['queued'])
+    with col2:
+        st.metric("Audit Events Written", audit_stats['written'])
+    with col3:
+        st.metric("Audit Events Dropped", audit_stats['dropped'])
+
+density_rows = []
+for camera in density_store.cameras():
+    density = density_store.window(camera, 60)
+    if density is None:
+        continue
+    latest = direction_counts(density['latest'])
+    average = direction_counts(density['mean'])
+    peak = direction_counts(density['max'])
+    for direction in ("northeast", "northwest", "southeast", "southwest"):
+        density_rows.append({
+            "Camera": camera,
+            "Region": direction.capitalize(),
+            "People Now": int(latest[direction]),
+            "Avg (1 min)": f"{average[direction]:.1f}",
+            "Peak (1 min)": int(peak[direction])
+        })
+if density_rows:
+    st.subheader("🗺️ Crowd Density by Region")
+    st.dataframe(density_rows, use_container_width=True)
+
+preprocess_cache = preprocess_stats.snapshot()
+if preprocess_cache:
+    st.subheader("🧩 Preprocessing Cache")
+    st.dataframe([{
+        "Transform": name,
+        "Hits": counts['hits'],
+        "Misses": counts['misses'],
+        "Hit Rate": f"{counts['hits'] / (counts['hits'] + counts['misses']):.0%}"
+    } for name, counts in preprocess_cache.items()], use_container_width=True)
+
 # Log page access
 log_user_action("dashboard_accessed")
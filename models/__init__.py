@@ -3,9 +3,16 @@
 # - Fire/Smoke detection
 # - Crowd surge detection  
 # - Unconscious person detection
+#
+# Crowd and unconscious detection share one YOLO pass per frame via detect_people()
+# Preprocessing (resize, blur, colour conversion) is cached per SharedFrame
 
 from .fire_smoke import check_fire_smoke
 from .crowd_surge import check_crowd_surge
 from .unconscious import check_unconscious
+from .detection import detect_people, detect_people_batch, PersonDetections, get_model, publish_detections, latest_detections, published_cameras
+from .frames import SharedFrame, preprocess, preprocess_stats
 
-__all__ = ['check_fire_smoke', 'check_crowd_surge', 'check_unconscious'] 
\ No newline at end of file
+__all__ = ['check_fire_smoke', 'check_crowd_surge', 'check_unconscious', 'detect_people', 'detect_people_batch', 'PersonDetections',
+           'get_model', 'publish_detections', 'latest_detections', 'published_cameras',
+           'SharedFrame', 'preprocess', 'preprocess_stats'] 
\ No newline at end of file
@@ -1,63 +1,72 @@
-from ultralytics import YOLO
 import cv2
 import numpy as np
+from .detection import detect_people
 
-# Load YOLOv8 model (load once, reuse)
-model = None
-
-def load_model():
-    """Load the YOLO model once"""
-    global model
-    if model is None:
-        try:
-            model = YOLO("yolov8n.pt")
-        except Exception as e:
-            print(f"Error loading YOLO model: {e}")
-            return False
-    return True
-
-def check_crowd_surge(frame):
+# Threshold for people per segment
+OVER_CROWD_THRESHOLD = 5
+
+# Grid size (rows x cols)
+ROWS, COLS = 1, 1
+
+def count_people_per_cell(detections, frame_shape, rows=ROWS, cols=COLS):
+    """
+    Bin person box centers into a rows x cols grid in one vectorized step
+    Returns a (rows, cols) array of people per cell
+    """
+    height, width = frame_shape[:2]
+    if len(detections) == 0:
+        return np.zeros((rows, cols), dtype=int)
+
+    xyxy = detections.boxes.astype(int)
+    cx = (xyxy[:, 0] + xyxy[:, 2]) // 2
+    cy = (xyxy[:, 1] + xyxy[:, 3]) // 2
+
+    row = np.clip(cy * rows // height, 0, rows - 1)
+    col = np.clip(cx * cols // width, 0, cols - 1)
+    counts = np.bincount(row * cols + col, minlength=rows * cols)
+    return counts.reshape(rows, cols)
+
+def count_people_in_regions(detections, regions):
+    """
+    Count person box centers inside each (x1, y1, x2, y2) region in one vectorized step
+    Regions may overlap; every box is tested against all of them at once
+    Returns an int array with one count per region
+    """
+    regions = np.asarray(regions, dtype=np.float32).reshape(-1, 4)
+    if len(detections) == 0:
+        return np.zeros(len(regions), dtype=int)
+
+    boxes = detections.boxes
+    cx = (boxes[:, 0] + boxes[:, 2]) / 2
+    cy = (boxes[:, 1] + boxes[:, 3]) / 2
+
+    # (regions, boxes) membership mask
+    inside = ((cx >= regions[:, 0:1]) & (cx < regions[:, 2:3]) &
+              (cy >= regions[:, 1:2]) & (cy < regions[:, 3:4]))
+    return inside.sum(axis=1)
+
+def check_crowd_surge(frame, detections=None, return_counts=False):
     """
     Check for crowd surge in the given frame
+    Pass detections from detect_people() to reuse an existing YOLO pass
     Returns True if crowd surge is detected, False otherwise
+    With return_counts=True returns (detected, per-cell count matrix)
     """
     print("Crowd surge")
+    segment_counts = np.zeros((ROWS, COLS), dtype=int)
     try:
-        if not load_model():
-            return False
-            
-        # Threshold for people per segment
-        OVER_CROWD_THRESHOLD = 5
-        
-        # Grid size (rows x cols)
-        ROWS, COLS = 1, 1
-        
-        height, width, _ = frame.shape
-        segment_counts = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-
-        # Run YOLOv8
-        results = model(frame)
-
-        for r in results:
-            for box in r.boxes:
-                cls = int(box.cls[0])
-                if cls == 0:  # person
-                    xyxy = box.xyxy[0].cpu().numpy().astype(int)
-                    cx = int((xyxy[0] + xyxy[2]) / 2)
-                    cy = int((xyxy[1] + xyxy[3]) / 2)
-
-                    row = min(ROWS - 1, cy * ROWS // height)
-                    col = min(COLS - 1, cx * COLS // width)
-                    segment_counts[row][col] += 1
+        if detections is None:
+            detections = detect_people(frame)
+        if detections is not None:
+            segment_counts = count_people_per_cell(detections, frame.shape)
 
         # Check if any segment has too many people
-        for i in range(ROWS):
-            for j in range(COLS):
-                if segment_counts[i][j] >= OVER_CROWD_THRESHOLD:
-                    return True
-                    
-        return False
+        detected = bool((segment_counts >= OVER_CROWD_THRESHOLD).any())
         
     except Exception as e:
         print(f"Error in crowd surge detection: {e}")
-        return False
\ No newline at end of file
+        detected = False
+
+    if return_counts:
+        return detected, segment_counts
+    return detected
@@ -0,0 +1,130 @@
+from ultralytics import YOLO
+import threading
+import time
+import numpy as np
+
+# COCO class id for "person"
+PERSON_CLASS_ID = 0
+
+DEFAULT_WEIGHTS = "yolov8n.pt"
+
+# Process-wide registry of loaded YOLO models, keyed by weights file
+_models = {}
+_model_lock = threading.Lock()
+
+# Shared YOLOv8 model (load once, reuse across all detectors and the chatbot)
+model = None
+
+def get_model(weights=DEFAULT_WEIGHTS):
+    """
+    Return the process-wide YOLO model for the given weights, loading it on first use
+    Returns None if the model could not be loaded
+    """
+    loaded = _models.get(weights)
+    if loaded is None:
+        with _model_lock:
+            loaded = _models.get(weights)
+            if loaded is None:
+                try:
+                    loaded = YOLO(weights)
+                except Exception as e:
+                    print(f"Error loading YOLO model: {e}")
+                    return None
+                _models[weights] = loaded
+    return loaded
+
+def load_model():
+    """Load the shared YOLO model once"""
+    global model
+    if model is None:
+        model = get_model()
+    return model is not None
+
+# Most recent person detections per camera, published by the monitoring loop
+_latest_detections = {}
+_latest_lock = threading.Lock()
+
+def publish_detections(camera, detections, timestamp=None):
+    """Store the latest detections for a camera so other components can reuse them"""
+    if detections is None:
+        return
+    if timestamp is None:
+        timestamp = time.time()
+    with _latest_lock:
+        _latest_detections[camera] = (detections, timestamp)
+
+def latest_detections(camera=None):
+    """
+    Return (detections, timestamp) last published for a camera,
+    or the most recent across all cameras when camera is None
+    Returns None if nothing has been published yet
+    """
+    with _latest_lock:
+        if camera is not None:
+            return _latest_detections.get(camera)
+        if not _latest_detections:
+            return None
+        return max(_latest_detections.values(), key=lambda item: item[1])
+
+def published_cameras():
+    """Cameras that have published detections so far, in camera order"""
+    with _latest_lock:
+        return sorted(_latest_detections)
+
+class PersonDetections:
+    """Person boxes found by a single YOLO pass over one frame"""
+
+    def __init__(self, boxes, confidences, frame_shape):
+        # boxes: (N, 4) float array of x1, y1, x2, y2 in frame pixels
+        self.boxes = boxes
+        self.confidences = confidences
+        self.frame_shape = frame_shape
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @classmethod
+    def empty(cls, frame_shape):
+        """Detections for a frame with no people"""
+        return cls(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), frame_shape)
+
+    @classmethod
+    def from_result(cls, result, frame_shape):
+        """Build detections from one ultralytics result, keeping only people"""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(frame_shape)
+
+        # One tensor -> NumPy transfer per field instead of one per box
+        xyxy = boxes.xyxy.cpu().numpy()
+        classes = boxes.cls.cpu().numpy().astype(int)
+        confidences = boxes.conf.cpu().numpy()
+
+        people = classes == PERSON_CLASS_ID
+        return cls(xyxy[people], confidences[people], frame_shape)
+
+def detect_people(frame):
+    """
+    Run YOLOv8 once on the given frame
+    Returns PersonDetections, or None if the model could not be loaded
+    """
+    if not load_model():
+        return None
+
+    results = model(frame)
+    if len(results) == 0:
+        return PersonDetections.empty(frame.shape)
+    return PersonDetections.from_result(results[0], frame.shape)
+
+def detect_people_batch(frames):
+    """
+    Run YOLOv8 once on a list of frames (e.g. one per camera)
+    Returns a list of PersonDetections in the same order, or None if the model could not be loaded
+    """
+    if not load_model():
+        return None
+    if len(frames) == 0:
+        return []
+
+    results = model(list(frames))
+    return [PersonDetections.from_result(result, frame.shape) for result, frame in zip(results, frames)]
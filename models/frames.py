@@ -0,0 +1,130 @@
+import threading
+from collections import Counter
+import cv2
+import numpy as np
+
+class PreprocessStats:
+    """Process-wide hit/miss counters for the per-frame preprocessing cache"""
+
+    def __init__(self):
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name, hit):
+        with self._lock:
+            if hit:
+                self.hits[name] += 1
+            else:
+                self.misses[name] += 1
+
+    def snapshot(self):
+        """{transform: {'hits': n, 'misses': n}} for every transform seen so far"""
+        with self._lock:
+            names = set(self.hits) | set(self.misses)
+            return {name: {'hits': self.hits[name], 'misses': self.misses[name]} for name in sorted(names)}
+
+    def reset(self):
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+preprocess_stats = PreprocessStats()
+
+# Readable names for common cv2 colour conversion codes
+COLOR_NAMES = {
+    cv2.COLOR_BGR2HSV: "hsv",
+    cv2.COLOR_BGR2GRAY: "gray",
+    cv2.COLOR_BGR2RGB: "rgb"
+}
+
+def _build_steps(resize=None, blur=None, color=None, interpolation=cv2.INTER_LINEAR):
+    """Preprocessing steps in the order they are applied: resize, blur, colour conversion"""
+    steps = []
+    if resize is not None:
+        steps.append(('resize', tuple(resize), interpolation))
+    if blur is not None:
+        steps.append(('blur', blur))
+    if color is not None:
+        steps.append(('color', color))
+    return tuple(steps)
+
+def _apply(step, image):
+    """Apply a single preprocessing step"""
+    if step[0] == 'resize':
+        return cv2.resize(image, step[1], interpolation=step[2])
+    if step[0] == 'blur':
+        # blur is a kernel size, or (kernel size, sigma) to set the sigma explicitly
+        size, sigma = step[1] if isinstance(step[1], tuple) else (step[1], 0)
+        return cv2.GaussianBlur(image, (size, size), sigma)
+    if step[0] == 'color':
+        return cv2.cvtColor(image, step[1])
+    raise ValueError(f"Unknown preprocessing step: {step[0]}")
+
+def _describe(steps):
+    """Readable name of a preprocessing chain, used as the stats key"""
+    parts = []
+    for step in steps:
+        if step[0] == 'resize':
+            parts.append(f"resize {step[1][0]}x{step[1][1]}")
+        elif step[0] == 'blur':
+            size, sigma = step[1] if isinstance(step[1], tuple) else (step[1], 0)
+            parts.append(f"blur {size}x{size}" + (f" sigma {sigma}" if sigma else ""))
+        else:
+            parts.append(COLOR_NAMES.get(step[1], f"color {step[1]}"))
+    return " > ".join(parts)
+
+class SharedFrame(np.ndarray):
+    """
+    Read-only camera frame shared by all detectors without copying
+    Derived images (resizes, blurs, colour conversions) are computed once per
+    frame and cached on it; every intermediate step is cached as well
+    """
+
+    def __new__(cls, image):
+        frame = np.asarray(image).view(cls)
+        frame.flags.writeable = False
+        return frame
+
+    def __array_finalize__(self, obj):
+        # Views and slices start with their own empty cache
+        self._derived = {}
+
+    def _transform(self, steps):
+        """Return the image for a chain of steps, computing only the uncached tail"""
+        if not steps:
+            return np.asarray(self)
+
+        image = self._derived.get(steps)
+        preprocess_stats.record(_describe(steps), image is not None)
+        if image is None:
+            image = _apply(steps[-1], self._transform(steps[:-1]))
+            image.flags.writeable = False
+            # setdefault keeps the first result if two threads raced to compute it
+            image = self._derived.setdefault(steps, image)
+        return image
+
+    def preprocess(self, resize=None, blur=None, color=None, interpolation=cv2.INTER_LINEAR):
+        """
+        Frame resized to resize (width, height), Gaussian blurred with a blur x blur
+        kernel (or a (size, sigma) pair) and converted with the cv2 colour code color;
+        each step is optional
+        """
+        return self._transform(_build_steps(resize, blur, color, interpolation))
+
+    def resized(self, size, interpolation=cv2.INTER_LINEAR):
+        """Frame resized to size (width, height), computed once per frame"""
+        return self.preprocess(resize=size, interpolation=interpolation)
+
+def preprocess(frame, resize=None, blur=None, color=None, interpolation=cv2.INTER_LINEAR):
+    """
+    Preprocess any frame; SharedFrames reuse their per-frame cache,
+    plain arrays are processed directly
+    """
+    if isinstance(frame, SharedFrame):
+        return frame.preprocess(resize, blur, color, interpolation)
+
+    image = frame
+    for step in _build_steps(resize, blur, color, interpolation):
+        image = _apply(step, image)
+    return image
@@ -1,6 +1,8 @@
 import streamlit as st
 import hashlib
-import sqlite3
+from database import init_schema, query_one, execute
+from audit_writer import get_audit_writer
+from retention import start_retention_job
 import os
 from datetime import datetime, timedelta
 
@@ -67,60 +69,22 @@ st.markdown("""
 
 def init_database():
     """Initialize the database with admin user"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            role TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    # Create sessions table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            session_token TEXT UNIQUE NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
-    
-    # Create audit log table
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS audit_log (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            action TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            ip_address TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
-        )
-    ''')
+    init_schema()
+    # Hourly cleanup of old detections, audit entries and expired sessions
+    start_retention_job()
     
     # Check if admin user exists, if not create default admin
-    cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-    if not cursor.fetchone():
+    if not query_one("SELECT id FROM users WHERE username = 'admin'"):
         # Default admin credentials (change these in production!)
         default_password = "admin123"
         password_hash = hashlib.sha256(default_password.encode()).hexdigest()
         
-        cursor.execute('''
+        execute('''
             INSERT INTO users (username, password_hash, role)
             VALUES (?, ?, ?)
         ''', ('admin', password_hash, 'admin'))
         
-        conn.commit()
         st.success("Default admin user created! Username: admin, Password: admin123")
-    
-    conn.close()
 
 def hash_password(password):
     """Hash password using SHA-256"""
@@ -128,19 +92,11 @@ def hash_password(password):
 
 def verify_login(username, password):
     """Verify user login credentials"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
     password_hash = hash_password(password)
-    cursor.execute('''
+    return query_one('''
         SELECT id, username, role FROM users 
         WHERE username = ? AND password_hash = ?
     ''', (username, password_hash))
-    
-    user = cursor.fetchone()
-    conn.close()
-    
-    return user
 
 def create_session(user_id):
     """Create a new session for the user"""
@@ -148,31 +104,17 @@ def create_session(user_id):
     session_token = secrets.token_urlsafe(32)
     expires_at = datetime.now() + timedelta(hours=8)  # 8 hour session
     
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
+    execute('''
         INSERT INTO sessions (user_id, session_token, expires_at)
         VALUES (?, ?, ?)
     ''', (user_id, session_token, expires_at))
     
-    conn.commit()
-    conn.close()
-    
     return session_token
 
 def log_audit_event(user_id, action, ip_address="unknown"):
     """Log audit events"""
-    conn = sqlite3.connect('admin_auth.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO audit_log (user_id, action, ip_address)
-        VALUES (?, ?, ?)
-    ''', (user_id, action, ip_address))
-    
-    conn.commit()
-    conn.close()
+    # Queued and written in batches by a background thread
+    get_audit_writer().log(user_id, action, ip_address)
 
 def main():
     # Initialize database
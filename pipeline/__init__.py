@@ -0,0 +1,18 @@
+# AI Event Monitoring Pipeline Package
+# This package contains the frame pipeline around the detection models:
+# - Multi-camera capture and batched inference
+# - Threaded capture into drop-oldest frame buffers
+# - Motion gating to skip detector work on static scenes
+# - Adaptive per-stage detection scheduling
+# - Optional process-pool detection backend with shared-memory frames
+# - Live per-camera, per-cell crowd density time series
+
+from .multi_camera import MultiCameraEngine
+from .motion_gate import MotionGate
+from .scheduler import DetectionScheduler
+from .capture import FrameBuffer, CaptureThread
+from .process_pool import ProcessDetectionBackend
+from .density_store import DensityStore, density_store
+
+__all__ = ['MultiCameraEngine', 'MotionGate', 'DetectionScheduler', 'FrameBuffer', 'CaptureThread', 'ProcessDetectionBackend',
+           'DensityStore', 'density_store']
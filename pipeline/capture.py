@@ -0,0 +1,74 @@
+import time
+import threading
+from collections import deque
+
+class FrameBuffer:
+    """
+    Bounded ring buffer between a capture thread and the detection loop
+    When full the oldest frame is dropped; consumers always get the freshest frame
+    """
+
+    def __init__(self, capacity=2):
+        self._frames = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def put(self, frame, captured_at=None):
+        """Add a newly captured frame, evicting the oldest one if the buffer is full"""
+        if captured_at is None:
+            captured_at = time.time()
+        with self._condition:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append((frame, captured_at))
+            self.captured += 1
+            self._condition.notify_all()
+
+    def latest(self, timeout=None):
+        """
+        Wait for a frame and return the freshest (frame, captured_at)
+        Older frames still in the buffer are discarded; returns None on timeout
+        """
+        with self._condition:
+            if not self._frames and not self._condition.wait_for(lambda: self._frames, timeout):
+                return None
+            item = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            self.processed += 1
+            return item
+
+    def stats(self):
+        """Frames captured, dropped and processed so far"""
+        with self._condition:
+            return {
+                'captured': self.captured,
+                'dropped': self.dropped,
+                'processed': self.processed
+            }
+
+class CaptureThread(threading.Thread):
+    """Producer thread that reads a cv2.VideoCapture into a FrameBuffer"""
+
+    def __init__(self, cap, frame_buffer):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frame_buffer = frame_buffer
+        self.failed = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                self.failed = True
+                break
+            self.frame_buffer.put(frame, time.time())
+
+    def stop(self, timeout=2.0):
+        """Stop capturing and wait for the thread to finish"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -0,0 +1,110 @@
+import time
+import threading
+import numpy as np
+
+# Grid published by the monitoring loop; 2x2 cells map directly onto the
+# chatbot's compass regions (north = top row, northeast = top-right cell, ...)
+DENSITY_GRID = (2, 2)
+
+# Cells of the 2x2 grid that make up each compass direction
+DIRECTION_CELLS = {
+    'north': [(0, 0), (0, 1)],
+    'south': [(1, 0), (1, 1)],
+    'east': [(0, 1), (1, 1)],
+    'west': [(0, 0), (1, 0)],
+    'northeast': [(0, 1)],
+    'northwest': [(0, 0)],
+    'southeast': [(1, 1)],
+    'southwest': [(1, 0)]
+}
+
+def direction_counts(counts):
+    """People per compass direction for a 2x2 grid of counts"""
+    counts = np.asarray(counts)
+    return {direction: float(sum(counts[cell] for cell in cells)) for direction, cells in DIRECTION_CELLS.items()}
+
+class _CameraSeries:
+    """Fixed-size ring buffer of (timestamp, rows x cols counts) samples for one camera"""
+
+    def __init__(self, shape, capacity):
+        self.times = np.zeros(capacity, dtype=np.float64)
+        self.counts = np.zeros((capacity,) + tuple(shape), dtype=np.int32)
+        self.next = 0
+        self.size = 0
+
+    def append(self, timestamp, counts):
+        self.times[self.next] = timestamp
+        self.counts[self.next] = counts
+        self.latest = (timestamp, self.counts[self.next].copy())
+        self.next = (self.next + 1) % len(self.times)
+        self.size = min(self.size + 1, len(self.times))
+
+class DensityStore:
+    """
+    In-memory time series of people per grid cell for every camera
+    The monitoring loop records a count grid per evaluated frame; readers get the
+    latest grid in O(1) and windowed aggregates with one vectorized pass over the buffer
+    """
+
+    def __init__(self, capacity=600):
+        # capacity: samples kept per camera (oldest are overwritten)
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, camera, counts, timestamp=None):
+        """Add a (rows, cols) grid of people counts for a camera"""
+        if timestamp is None:
+            timestamp = time.time()
+        counts = np.asarray(counts)
+        with self._lock:
+            series = self._series.get(camera)
+            # A different grid size starts a fresh series
+            if series is None or series.counts.shape[1:] != counts.shape:
+                series = _CameraSeries(counts.shape, self.capacity)
+                self._series[camera] = series
+            series.append(timestamp, counts)
+
+    def cameras(self):
+        """Cameras that have recorded at least one sample"""
+        with self._lock:
+            return list(self._series)
+
+    def latest(self, camera):
+        """Return (timestamp, counts grid) last recorded for a camera, or None"""
+        with self._lock:
+            series = self._series.get(camera)
+            return series.latest if series is not None else None
+
+    def window(self, camera, seconds, now=None):
+        """
+        Aggregate a camera's samples from the last given seconds
+        Returns {'samples', 'mean', 'max', 'latest'} with per-cell grids, or None if there are no samples
+        """
+        if now is None:
+            now = time.time()
+        with self._lock:
+            series = self._series.get(camera)
+            if series is None:
+                return None
+            times = series.times[:series.size]
+            in_window = times >= now - seconds
+            if not in_window.any():
+                return None
+            counts = series.counts[:series.size][in_window]
+            latest = series.latest[1]
+
+        return {
+            'samples': len(counts),
+            'mean': counts.mean(axis=0),
+            'max': counts.max(axis=0),
+            'latest': latest
+        }
+
+    def clear(self):
+        """Forget all recorded samples"""
+        with self._lock:
+            self._series = {}
+
+# Process-wide store shared by the monitoring loop, dashboard and chatbot
+density_store = DensityStore()
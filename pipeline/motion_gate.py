@@ -0,0 +1,68 @@
+import time
+import cv2
+from models.frames import preprocess
+
+# Grayscale difference (0-255) at which a thumbnail pixel counts as changed
+PIXEL_THRESHOLD = 25
+
+# Fraction of changed thumbnail pixels that counts as motion; in a 1280x720 frame a
+# 200x80 px person changes about 1.3% of the thumbnail and a 60x60 px flame about 0.4%
+MOTION_THRESHOLD = 0.002
+
+class MotionGate:
+    """
+    Cheap frame-differencing gate in front of the detectors
+    Frames where too few pixels differ from the last evaluated frame are skipped so the
+    previous verdicts can be reused; a re-evaluation is forced every max_interval seconds.
+    Counting changed pixels (rather than averaging the difference) keeps a small local
+    change, such as one person entering or a fire starting, from being averaged away
+    """
+
+    def __init__(self, threshold=MOTION_THRESHOLD, max_interval=10.0, size=(64, 48), pixel_threshold=PIXEL_THRESHOLD):
+        # threshold: fraction of thumbnail pixels (0-1) that must change
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.max_interval = max_interval
+        self.size = size
+        self.reference = None
+        self.last_evaluated = 0.0
+        self.evaluated = 0
+        self.skipped = 0
+
+    def _signature(self, frame):
+        """
+        Downsampled grayscale version of the frame used for differencing
+        Taken from the SharedFrame cache, so the gates of all stages share one computation
+        """
+        return preprocess(frame, resize=self.size, color=cv2.COLOR_BGR2GRAY, interpolation=cv2.INTER_AREA)
+
+    def should_process(self, frame, now=None):
+        """Return True if the detectors should run on this frame"""
+        if now is None:
+            now = time.time()
+        signature = self._signature(frame)
+
+        if self.reference is None or now - self.last_evaluated >= self.max_interval:
+            changed = True
+        else:
+            changed = self.changed_fraction(signature) >= self.threshold
+
+        if changed:
+            # Compare later frames against the last evaluated one so slow drift still triggers
+            self.reference = signature
+            self.last_evaluated = now
+            self.evaluated += 1
+        else:
+            self.skipped += 1
+        return changed
+
+    def changed_fraction(self, signature):
+        """Fraction of thumbnail pixels that differ from the reference by more than pixel_threshold"""
+        diff = cv2.absdiff(signature, self.reference)
+        _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(mask) / mask.size
+
+    def skip_ratio(self):
+        """Fraction of frames that reused the previous verdicts"""
+        total = self.evaluated + self.skipped
+        return self.skipped / total if total else 0.0
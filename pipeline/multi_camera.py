@@ -0,0 +1,182 @@
+import time
+import cv2
+from models.fire_smoke import check_fire_smoke
+from models.crowd_surge import check_crowd_surge, count_people_per_cell
+from models.unconscious import check_unconscious
+from models.detection import detect_people_batch, publish_detections
+from .motion_gate import MotionGate
+from .capture import FrameBuffer, CaptureThread
+from .density_store import density_store, DENSITY_GRID
+from models.frames import SharedFrame
+
+# Detection stages: 'people' is the shared YOLO pass behind crowd and unconscious checks
+STAGES = ('fire', 'people')
+
+def _timed(func, *args):
+    """Call func and return (result, seconds taken)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+class MultiCameraEngine:
+    """
+    Reads frames from several cameras and runs YOLO on them as a single batch
+    Each camera is read by its own capture thread into a drop-oldest FrameBuffer,
+    so slow detection never makes the camera stream lag behind
+    """
+
+    def __init__(self, sources, executor=None, motion_threshold=None, max_interval=10.0, backend=None,
+                 fast_fire=False, store=None):
+        # sources: camera indices or stream URLs accepted by cv2.VideoCapture
+        self.sources = list(sources)
+        # Optional executor to run the cheap fire checks alongside the YOLO batch
+        self.executor = executor
+        # Optional ProcessDetectionBackend; when set detection runs in worker processes
+        self.backend = backend
+        # Use the downscaled fire detector
+        self.fast_fire = fast_fire
+        # Per-cell people counts are recorded here for the dashboard and chatbot
+        self.density_store = store if store is not None else density_store
+        self.captures = {}
+        self.buffers = {}
+        self.capture_threads = {}
+        # Capture time of the frames returned by the last read_frames() call
+        self.capture_times = {}
+        # Per-camera, per-stage motion gates (disabled when motion_threshold is None)
+        self.motion_threshold = motion_threshold
+        self.max_interval = max_interval
+        self.gates = {}
+        # Most recent verdicts for every camera, reused while a scene is static
+        self.latest_results = {}
+        # Seconds spent per stage in the last process() call
+        self.last_timings = {}
+
+    def open(self):
+        """Open all camera sources, returns the list of sources that opened"""
+        for source in self.sources:
+            cap = cv2.VideoCapture(source)
+            if cap.isOpened():
+                self.captures[source] = cap
+                self.buffers[source] = FrameBuffer()
+                self.capture_threads[source] = CaptureThread(cap, self.buffers[source])
+                self.capture_threads[source].start()
+                if self.motion_threshold is not None:
+                    for stage in STAGES:
+                        self.gates[(source, stage)] = MotionGate(self.motion_threshold, self.max_interval)
+            else:
+                print(f"Could not open camera {source}")
+                cap.release()
+        return list(self.captures)
+
+    def read_frames(self, timeout=1.0):
+        """Take the freshest frame from every camera that produced one, returns {camera: SharedFrame}"""
+        frames = {}
+        self.capture_times = {}
+        for source, frame_buffer in self.buffers.items():
+            item = frame_buffer.latest(timeout)
+            if item is not None:
+                frame, self.capture_times[source] = item
+                # Read-only and shared by all detectors, so no per-detector copies
+                frames[source] = SharedFrame(frame)
+        return frames
+
+    def capture_stats(self):
+        """Frames captured, dropped and processed per camera"""
+        return {source: frame_buffer.stats() for source, frame_buffer in self.buffers.items()}
+
+    def _changed(self, frames, stage):
+        """Cameras whose scene changed since the stage last evaluated them"""
+        return [camera for camera in frames
+                if (camera, stage) not in self.gates or self.gates[(camera, stage)].should_process(frames[camera])]
+
+    def process(self, frames, stages=STAGES):
+        """
+        Run the given detection stages on {camera: frame} with one batched YOLO pass,
+        or across worker processes when a process backend is set
+        'fire' runs check_fire_smoke, 'people' runs check_crowd_surge and check_unconscious
+        Cameras whose motion gate reports a static scene are skipped and keep
+        their previous verdicts in latest_results; stage timings go to last_timings
+        Returns {camera: {'fire': bool, 'crowd': bool, 'unconscious': bool}} for evaluated
+        cameras, holding only the keys of the stages that ran
+        """
+        self.last_timings = {}
+        fire_cameras = self._changed(frames, 'fire') if 'fire' in stages else []
+        people_cameras = self._changed(frames, 'people') if 'people' in stages else []
+        results = {camera: {} for camera in fire_cameras + people_cameras}
+
+        if self.backend is not None:
+            self._process_in_workers(frames, fire_cameras, people_cameras, results)
+        else:
+            self._process_in_threads(frames, fire_cameras, people_cameras, results)
+
+        for camera, result in results.items():
+            self.latest_results.setdefault(camera, {'fire': False, 'crowd': False, 'unconscious': False})
+            self.latest_results[camera].update(result)
+        return results
+
+    def _process_in_threads(self, frames, fire_cameras, people_cameras, results):
+        """Batched YOLO in this process, fire checks on the optional thread executor"""
+        fire_futures = None
+        if fire_cameras and self.executor is not None:
+            fire_futures = [self.executor.submit(_timed, check_fire_smoke, frames[camera], self.fast_fire) for camera in fire_cameras]
+
+        if people_cameras:
+            start = time.perf_counter()
+            batch = [frames[camera] for camera in people_cameras]
+            detections = detect_people_batch(batch)
+            if detections is None:
+                detections = [None] * len(batch)
+            for camera, frame, people in zip(people_cameras, batch, detections):
+                self._publish(camera, people)
+                results[camera]['crowd'] = check_crowd_surge(frame, people)
+                results[camera]['unconscious'] = check_unconscious(frame, people)
+            self.last_timings['people'] = time.perf_counter() - start
+
+        if fire_cameras:
+            # Summed CPU time of the fire checks across cameras
+            fire_time = 0.0
+            for i, camera in enumerate(fire_cameras):
+                if fire_futures is not None:
+                    fire_detected, seconds = fire_futures[i].result()
+                else:
+                    fire_detected, seconds = _timed(check_fire_smoke, frames[camera], self.fast_fire)
+                results[camera]['fire'] = fire_detected
+                fire_time += seconds
+            self.last_timings['fire'] = fire_time
+
+    def _process_in_workers(self, frames, fire_cameras, people_cameras, results):
+        """One task per camera on the process backend; stage timings are the slowest worker's"""
+        tasks = {}
+        for camera in results:
+            stages = [stage for stage, cameras in (('fire', fire_cameras), ('people', people_cameras))
+                      if camera in cameras]
+            tasks[camera] = (frames[camera], stages)
+
+        for camera, (result, timings) in self.backend.run(tasks, self.fast_fire).items():
+            # Workers send their person boxes back so they can be published in this process
+            self._publish(camera, result.pop('detections', None))
+            results[camera].update(result)
+            for stage, seconds in timings.items():
+                self.last_timings[stage] = max(self.last_timings.get(stage, 0.0), seconds)
+
+    def _publish(self, camera, detections):
+        """Share a camera's person boxes and per-cell counts with the chatbot and dashboard"""
+        if detections is None:
+            return
+        captured_at = self.capture_times.get(camera)
+        publish_detections(camera, detections, captured_at)
+        counts = count_people_per_cell(detections, detections.frame_shape, *DENSITY_GRID)
+        self.density_store.record(camera, counts, captured_at)
+
+    def release(self):
+        """Stop the capture threads, release all cameras and shut down the backend"""
+        for capture_thread in self.capture_threads.values():
+            capture_thread.stop()
+        for cap in self.captures.values():
+            cap.release()
+        self.captures = {}
+        self.buffers = {}
+        self.capture_threads = {}
+        if self.backend is not None:
+            self.backend.close()
+            self.backend = None
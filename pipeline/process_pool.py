@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from models.fire_smoke import check_fire_smoke
+from models.crowd_surge import check_crowd_surge
+from models.unconscious import check_unconscious
+from models.detection import detect_people, load_model
+
+def _init_worker():
+    """Load the YOLO model once per worker process"""
+    load_model()
+
+def _detect_shared(shm_name, shape, dtype, stages, fast_fire=False):
+    """
+    Worker task: run the given stages on a frame stored in shared memory
+    Returns (result, timings) like MultiCameraEngine.process for one camera;
+    result also carries the PersonDetections under 'detections' when people ran
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        result = {}
+        timings = {}
+
+        if 'fire' in stages:
+            start = time.perf_counter()
+            result['fire'] = check_fire_smoke(frame, fast_fire)
+            timings['fire'] = time.perf_counter() - start
+
+        if 'people' in stages:
+            start = time.perf_counter()
+            detections = detect_people(frame)
+            result['detections'] = detections
+            result['crowd'] = check_crowd_surge(frame, detections)
+            result['unconscious'] = check_unconscious(frame, detections)
+            timings['people'] = time.perf_counter() - start
+
+        # Drop the view before closing so the buffer is not exported any more
+        del frame
+        return result, timings
+    finally:
+        shm.close()
+
+class ProcessDetectionBackend:
+    """
+    Runs detection in a pool of worker processes to escape the GIL
+    Each worker loads its own YOLO model once; frames are handed over through
+    shared memory blocks (one per camera, reused across frames) instead of pickling
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Spawn fresh interpreters: forking a process that already runs capture, audit
+        # and Streamlit threads and has initialized torch/OpenMP can deadlock the workers
+        self.executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_init_worker)
+        self._blocks = {}
+
+    def _share(self, camera, frame):
+        """Copy a frame into the camera's shared memory block, growing it if needed"""
+        block = self._blocks.get(camera)
+        if block is None or block.size < frame.nbytes:
+            if block is not None:
+                block.close()
+                block.unlink()
+            block = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            self._blocks[camera] = block
+        np.ndarray(frame.shape, dtype=frame.dtype, buffer=block.buf)[:] = frame
+        return block.name
+
+    def run(self, tasks, fast_fire=False):
+        """
+        Run detection for {camera: (frame, stages)} across the worker processes
+        fast_fire selects the downscaled fire detector
+        Returns {camera: (result, timings)}
+        """
+        futures = {}
+        for camera, (frame, stages) in tasks.items():
+            shm_name = self._share(camera, frame)
+            futures[camera] = self.executor.submit(_detect_shared, shm_name, frame.shape, frame.dtype.str, tuple(stages), fast_fire)
+        return {camera: future.result() for camera, future in futures.items()}
+
+    def close(self):
+        """Shut the pool down and free the shared memory blocks"""
+        self.executor.shutdown()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
@@ -0,0 +1,74 @@
+import math
+
+class DetectionScheduler:
+    """
+    Adaptive sampling of detection stages
+    Measures each stage's latency and picks per-stage frame intervals so the
+    amortized detection cost fits in the target end-to-end frame latency
+    """
+
+    def __init__(self, stages, target_latency=0.1, min_intervals=None, max_interval=30, smoothing=0.2):
+        # stages: names of the detection stages, e.g. ['fire', 'people']
+        self.stages = list(stages)
+        self.target_latency = target_latency
+        self.max_interval = max_interval
+        self.smoothing = smoothing
+        min_intervals = min_intervals or {}
+        self.min_intervals = {stage: min_intervals.get(stage, 1) for stage in self.stages}
+        self.intervals = dict(self.min_intervals)
+        self.latency = {stage: None for stage in self.stages}
+        self.last_run = {stage: None for stage in self.stages}
+        self.overhead = None
+
+    def _smooth(self, previous, value):
+        """Exponential moving average"""
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+
+    def due(self, frame_index):
+        """Return the stages that should run on this frame"""
+        due = []
+        for stage in self.stages:
+            last = self.last_run[stage]
+            if last is None or frame_index - last >= self.intervals[stage]:
+                due.append(stage)
+        return due
+
+    def record(self, stage, seconds, frame_index):
+        """Record that a stage ran on this frame and how long it took"""
+        self.latency[stage] = self._smooth(self.latency[stage], seconds)
+        self.last_run[stage] = frame_index
+        self._adjust()
+
+    def record_overhead(self, seconds):
+        """Record per-frame time spent outside the detectors (capture, display, sleep)"""
+        self.overhead = self._smooth(self.overhead, seconds)
+        self._adjust()
+
+    def _adjust(self):
+        """Recompute stage intervals from the measured latencies"""
+        # Keep at least a tenth of the target for detection even if overhead eats it all
+        budget = max(self.target_latency * 0.1, self.target_latency - (self.overhead or 0.0))
+
+        # Cheapest stages first so whatever budget they leave over goes to the expensive ones
+        measured = sorted((latency, stage) for stage, latency in self.latency.items() if latency is not None)
+        remaining = budget
+        for i, (latency, stage) in enumerate(measured):
+            share = remaining / (len(measured) - i)
+            interval = math.ceil(latency / share) if share > 0 else self.max_interval
+            interval = max(self.min_intervals[stage], min(self.max_interval, interval))
+            self.intervals[stage] = interval
+            remaining = max(0.0, remaining - latency / interval)
+
+    def rates(self, fps=None):
+        """Current effective rates per stage: interval in frames, latency and runs per second"""
+        rates = {}
+        for stage in self.stages:
+            latency = self.latency[stage]
+            rates[stage] = {
+                'interval': self.intervals[stage],
+                'latency_ms': latency * 1000 if latency is not None else None,
+                'runs_per_second': fps / self.intervals[stage] if fps else None
+            }
+        return rates
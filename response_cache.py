@@ -0,0 +1,81 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# Seconds a cached chatbot answer may be reused while the system state is unchanged
+RESPONSE_CACHE_TTL = 120.0
+
+# Maximum number of cached answers (least recently used are evicted)
+RESPONSE_CACHE_SIZE = 256
+
+def normalize_query(query):
+    """Lower-case a question and collapse punctuation and whitespace so rephrasings of case/spacing match"""
+    return " ".join(re.sub(r"[^\w\s-]", " ", query.lower()).split())
+
+def fingerprint(context):
+    """Stable hash of a JSON-serializable context (dict key order does not matter)"""
+    payload = json.dumps(context, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ResponseCache:
+    """
+    Bounded TTL cache of chatbot answers
+    Keyed by the normalized question plus a fingerprint of the live context it was
+    answered from, so an answer is only reused while that context is unchanged
+    """
+
+    def __init__(self, ttl=RESPONSE_CACHE_TTL, max_size=RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # (normalized query, context fingerprint) -> (stored_at, answer)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, query, context):
+        return (normalize_query(query), fingerprint(context))
+
+    def get(self, key, now=None):
+        """Return the cached answer for key, or None if it must be generated"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, answer = entry
+                if now - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return answer
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, answer, now=None):
+        """Cache an answer that was just generated"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            self._entries[key] = (now, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Cache size, hits, misses and hit rate so far"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Retention and compaction for admin_auth.db
+Deletes old raw detections, old minute rollups, old audit log entries and expired
+sessions in small chunks, then returns freed pages to the filesystem with an incremental
+vacuum. Hourly and daily rollups are kept forever so historical charts survive raw-data expiry.
+
+Usage: python retention.py [--detections-days 30] [--minute-rollup-days 7] [--audit-days 90]
+                           [--chunk-size 5000] [--vacuum-pages 2000]
+                           [--enable-incremental-vacuum] [--db PATH]
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import database
+
+# Default retention in days per table (None keeps rows forever)
+RETENTION_DAYS = {
+    'detections': 30,
+    # Minute buckets are only read for windows of a few hours (see pick_resolution)
+    'minute_rollups': 7,
+    'audit_log': 90
+}
+
+# Rows deleted per transaction; small chunks keep the write lock short
+CHUNK_SIZE = 5000
+
+# Pause between chunks so other writers (audit writer, logins) get the lock
+CHUNK_PAUSE = 0.01
+
+# Pages released per incremental vacuum run
+VACUUM_PAGES = 2000
+
+def _delete_in_chunks(table, condition, params, chunk_size=CHUNK_SIZE, pause=CHUNK_PAUSE, key="rowid"):
+    """
+    Delete matching rows chunk by chunk, one short transaction each; returns rows deleted
+    key identifies a row: rowid, or the primary key columns of a WITHOUT ROWID table
+    """
+    deleted = 0
+    while True:
+        cursor = database.execute(f'''
+            DELETE FROM {table} WHERE ({key}) IN (
+                SELECT {key} FROM {table} WHERE {condition} LIMIT ?
+            )
+        ''', tuple(params) + (chunk_size,))
+        deleted += cursor.rowcount
+        if cursor.rowcount < chunk_size:
+            return deleted
+        time.sleep(pause)
+
+def purge_detections(days, chunk_size=CHUNK_SIZE):
+    """Delete raw detections older than days (rollups are not touched)"""
+    cutoff = int(time.time() - days * 86400)
+    return _delete_in_chunks('detections', 'detected_at < ?', (cutoff,), chunk_size)
+
+def purge_minute_rollups(days, chunk_size=CHUNK_SIZE):
+    """Delete minute rollup buckets older than days (hourly and daily rollups are kept)"""
+    cutoff = int(time.time() - days * 86400)
+    return _delete_in_chunks('detection_rollups', 'resolution = 60 AND bucket < ?', (cutoff,), chunk_size,
+                             key="resolution, bucket, detector, camera_id")
+
+def purge_audit_log(days, chunk_size=CHUNK_SIZE):
+    """Delete audit log entries older than days"""
+    # audit_log timestamps are UTC 'YYYY-MM-DD HH:MM:SS' strings
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    return _delete_in_chunks('audit_log', 'timestamp < ?', (cutoff,), chunk_size)
+
+def purge_expired_sessions(chunk_size=CHUNK_SIZE):
+    """Delete sessions that have expired"""
+    return _delete_in_chunks('sessions', 'expires_at < ?', (datetime.now(),), chunk_size)
+
+def incremental_vacuum(pages=VACUUM_PAGES):
+    """
+    Return up to pages free pages to the filesystem
+    Returns the number of pages released, or None if incremental auto-vacuum is not enabled
+    """
+    if database.query_one("PRAGMA auto_vacuum")[0] != 2:
+        return None
+    before = database.query_one("PRAGMA freelist_count")[0]
+    # incremental_vacuum returns one row per step; fetch them all so it runs to completion
+    database.query_all(f"PRAGMA incremental_vacuum({int(pages)})")
+    return before - database.query_one("PRAGMA freelist_count")[0]
+
+def enable_incremental_vacuum():
+    """
+    Switch an existing database to incremental auto-vacuum
+    Runs a full VACUUM once, which rewrites the file and locks it for its duration
+    """
+    if database.query_one("PRAGMA auto_vacuum")[0] == 2:
+        return False
+    with database.connection() as conn:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    return True
+
+def run_retention(retention_days=None, chunk_size=CHUNK_SIZE, vacuum_pages=VACUUM_PAGES):
+    """
+    Apply the retention policies once
+    Returns {'detections': n, 'minute_rollups': n, 'audit_log': n, 'sessions': n, 'vacuumed_pages': n or None}
+    """
+    policies = dict(RETENTION_DAYS)
+    policies.update(retention_days or {})
+
+    summary = {'detections': 0, 'minute_rollups': 0, 'audit_log': 0}
+    if policies.get('detections') is not None:
+        summary['detections'] = purge_detections(policies['detections'], chunk_size)
+    if policies.get('minute_rollups') is not None:
+        summary['minute_rollups'] = purge_minute_rollups(policies['minute_rollups'], chunk_size)
+    if policies.get('audit_log') is not None:
+        summary['audit_log'] = purge_audit_log(policies['audit_log'], chunk_size)
+    summary['sessions'] = purge_expired_sessions(chunk_size)
+    summary['vacuumed_pages'] = incremental_vacuum(vacuum_pages)
+    return summary
+
+class RetentionJob(threading.Thread):
+    """Background thread that applies the retention policies every interval seconds"""
+
+    def __init__(self, interval=3600, retention_days=None):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.retention_days = retention_days
+        self.last_summary = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.last_summary = run_retention(self.retention_days)
+            except Exception as e:
+                print(f"Error running retention job: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout=5.0):
+        """Stop the job and wait for the current run to finish"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+_job = None
+_job_lock = threading.Lock()
+
+def start_retention_job(interval=3600):
+    """Start the process-wide retention job once; later calls return the running job"""
+    global _job
+    if _job is None:
+        with _job_lock:
+            if _job is None:
+                job = RetentionJob(interval)
+                job.start()
+                _job = job
+    return _job
+
+def main():
+    """Run retention once from the command line"""
+    parser = argparse.ArgumentParser(description="Delete expired data from admin_auth.db and compact it")
+    parser.add_argument("--db", default=database.DB_PATH, help="database file")
+    parser.add_argument("--detections-days", type=int, default=RETENTION_DAYS['detections'],
+                        help="keep raw detections this many days")
+    parser.add_argument("--minute-rollup-days", type=int, default=RETENTION_DAYS['minute_rollups'],
+                        help="keep per-minute alert rollups this many days")
+    parser.add_argument("--audit-days", type=int, default=RETENTION_DAYS['audit_log'],
+                        help="keep audit log entries this many days")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows deleted per transaction")
+    parser.add_argument("--vacuum-pages", type=int, default=VACUUM_PAGES, help="pages released per run")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="convert the database to incremental auto-vacuum first (runs a full VACUUM)")
+    args = parser.parse_args()
+
+    database.DB_PATH = args.db
+    database.init_schema()
+
+    print("🧹 Applying retention policies...")
+    if args.enable_incremental_vacuum and enable_incremental_vacuum():
+        print("   Converted database to incremental auto-vacuum")
+
+    start = time.perf_counter()
+    summary = run_retention({'detections': args.detections_days, 'minute_rollups': args.minute_rollup_days,
+                             'audit_log': args.audit_days},
+                            args.chunk_size, args.vacuum_pages)
+
+    print(f"   Detections deleted: {summary['detections']}")
+    print(f"   Minute rollups deleted: {summary['minute_rollups']}")
+    print(f"   Audit log entries deleted: {summary['audit_log']}")
+    print(f"   Expired sessions deleted: {summary['sessions']}")
+    if summary['vacuumed_pages'] is None:
+        print("   Incremental vacuum not enabled (use --enable-incremental-vacuum once)")
+    else:
+        print(f"   Pages released: {summary['vacuumed_pages']}")
+    print(f"   Done in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
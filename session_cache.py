@@ -0,0 +1,115 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from database import query_one
+
+# Seconds a validated session is trusted before the database is checked again
+SESSION_CACHE_TTL = 30.0
+
+# Maximum number of cached sessions (least recently used are evicted)
+SESSION_CACHE_SIZE = 1024
+
+class SessionCache:
+    """
+    Bounded TTL cache of validated session tokens
+    Entries are keyed by a hash of the token so raw tokens are not kept in memory
+    and never outlive the session's own expiry time
+    """
+
+    def __init__(self, ttl=SESSION_CACHE_TTL, max_size=SESSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        # token hash -> (checked_at, expires_at, user_id, session row)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token, now=None):
+        """Return the cached session row for a token, or None if it must be checked in the database"""
+        if now is None:
+            now = time.time()
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                checked_at, expires_at, _, session = entry
+                if now - checked_at < self.ttl and (expires_at is None or now < expires_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return session
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, session, user_id=None, expires_at=None, now=None):
+        """Cache a session row that was just validated against the database"""
+        if now is None:
+            now = time.time()
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (now, expires_at, user_id, session)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token):
+        """Forget a token, e.g. on logout"""
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def invalidate_user(self, user_id):
+        """Forget every cached session of a user, e.g. when the user is deleted"""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry[2] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Cache size, hits, misses and hit rate so far"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+# Process-wide cache shared by every page of the app
+session_cache = SessionCache()
+
+def _expiry_epoch(expires_at):
+    """Epoch seconds of a sessions.expires_at value, or None if it cannot be parsed"""
+    try:
+        return datetime.fromisoformat(str(expires_at)).timestamp()
+    except ValueError:
+        return None
+
+def validate_session(token):
+    """
+    Return (session id, user id, expires_at, username, role) for a valid token, or None
+    The database is consulted at most once per SESSION_CACHE_TTL seconds per session
+    """
+    session = session_cache.get(token)
+    if session is not None:
+        return session
+
+    session = query_one('''
+        SELECT s.id, s.user_id, s.expires_at, u.username, u.role
+        FROM sessions s
+        JOIN users u ON s.user_id = u.id
+        WHERE s.session_token = ? AND s.expires_at > ?
+    ''', (token, datetime.now()))
+    if session is not None:
+        session_cache.put(token, session, user_id=session[1], expires_at=_expiry_epoch(session[2]))
+    return session
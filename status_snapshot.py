@@ -0,0 +1,182 @@
+import threading
+import time
+from datetime import datetime
+from database import query_one, query_all
+from detection_log import DETECTORS
+
+# Seconds between incremental refreshes of the status counters
+STATUS_REFRESH_INTERVAL = 5.0
+
+# Seconds between full recounts, which pick up deletes (retention, admin actions)
+FULL_RECOUNT_INTERVAL = 600.0
+
+# Sliding window of the "recent" counters, counted in per-minute buckets
+STATUS_WINDOW_SECONDS = 24 * 3600
+BUCKET_SECONDS = 60
+
+# (table, epoch expression, key expression, cutoff expression) for each windowed counter;
+# audit_log timestamps are UTC 'YYYY-MM-DD HH:MM:SS' strings, detections use epoch seconds
+WINDOWED_TABLES = {
+    'audit_log': ("audit_log", "CAST(strftime('%s', timestamp) AS INTEGER)", "'all'",
+                  "timestamp >= strftime('%Y-%m-%d %H:%M:%S', ?, 'unixepoch')"),
+    'detections': ("detections", "detected_at", "detector", "detected_at >= ?")
+}
+
+class _WindowCounter:
+    """Counts per key over a sliding window, kept as per-minute buckets with running totals"""
+
+    def __init__(self, window=STATUS_WINDOW_SECONDS, bucket=BUCKET_SECONDS):
+        self.window = window
+        self.bucket = bucket
+        self.buckets = {}
+        self.totals = {}
+
+    def add(self, rows, now):
+        """Add (bucket start, key, count) rows, ignoring those already outside the window"""
+        cutoff = now - self.window
+        for start, key, count in rows:
+            if start is None or start + self.bucket <= cutoff:
+                continue
+            counts = self.buckets.setdefault(start, {})
+            counts[key] = counts.get(key, 0) + count
+            self.totals[key] = self.totals.get(key, 0) + count
+
+    def expire(self, now):
+        """Drop buckets that have left the window (at most one window's worth of buckets is kept)"""
+        cutoff = now - self.window
+        for start in [start for start in self.buckets if start + self.bucket <= cutoff]:
+            for key, count in self.buckets.pop(start).items():
+                self.totals[key] -= count
+
+    def clear(self):
+        self.buckets.clear()
+        self.totals.clear()
+
+class StatusSnapshot(threading.Thread):
+    """
+    Background service that keeps the dashboard and chatbot status counters in memory
+    Every interval it reads only the audit_log and detections rows inserted since the last
+    refresh (by id), so refresh cost follows the insert rate rather than table size; a full
+    recount every recount_interval seconds picks up deleted rows. Reads never touch the database
+    """
+
+    def __init__(self, interval=STATUS_REFRESH_INTERVAL, recount_interval=FULL_RECOUNT_INTERVAL):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.recount_interval = recount_interval
+        self._lock = threading.Lock()
+        # Serializes refreshes: the counters are updated in place
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._snapshot = None
+        self._last_ids = {}
+        self._windows = {table: _WindowCounter() for table in WINDOWED_TABLES}
+        self._total_audit_entries = 0
+        self._last_recount = 0.0
+        self.refreshes = 0
+
+    def _load_window(self, table, after_id, up_to_id, now):
+        """
+        Add per-minute counts of rows in (after_id, up_to_id] to the table's window
+        A full recount (after_id 0) also filters on the window start; returns the rows read
+        """
+        name, epoch, key, cutoff = WINDOWED_TABLES[table]
+        sql = f'''
+            SELECT {epoch} - {epoch} % ?, {key}, COUNT(*)
+            FROM {name}
+            WHERE id > ? AND id <= ?
+        '''
+        params = [BUCKET_SECONDS, after_id, up_to_id]
+        if after_id == 0:
+            sql += f" AND {cutoff}"
+            params.append(int(now - STATUS_WINDOW_SECONDS))
+        sql += " GROUP BY 1, 2"
+        rows = query_all(sql, params)
+        self._windows[table].add(rows, now)
+        return sum(count for _, _, count in rows)
+
+    def refresh(self, full=False):
+        """Update the counters from rows inserted since the last refresh (or recount everything)"""
+        with self._refresh_lock:
+            return self._refresh(full)
+
+    def _refresh(self, full):
+        now = time.time()
+        full = full or self._snapshot is None or now - self._last_recount >= self.recount_interval
+
+        new_audit_entries = 0
+        for table in WINDOWED_TABLES:
+            last_id = query_one(f"SELECT COALESCE(MAX(id), 0) FROM {table}")[0]
+            if full:
+                self._windows[table].clear()
+                self._last_ids[table] = 0
+            previous = self._last_ids.get(table, 0)
+            if last_id > previous:
+                added = self._load_window(table, previous, last_id, now)
+                if table == 'audit_log' and not full:
+                    new_audit_entries = added
+            self._last_ids[table] = max(previous, last_id)
+            self._windows[table].expire(now)
+
+        if full:
+            # Up to the same id as the window, so rows inserted meanwhile are not counted twice
+            self._total_audit_entries = query_one("SELECT COUNT(*) FROM audit_log WHERE id <= ?",
+                                                  (self._last_ids['audit_log'],))[0]
+            self._last_recount = now
+        else:
+            self._total_audit_entries += new_audit_entries
+
+        # Small tables and index range scans over live rows only
+        total_users, admin_users = query_one("SELECT COUNT(*), COALESCE(SUM(role = 'admin'), 0) FROM users")
+        active_sessions = query_one("SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (datetime.now(),))[0]
+
+        detections = self._windows['detections'].totals
+        snapshot = {
+            'total_users': total_users,
+            'admin_users': admin_users,
+            'active_sessions': active_sessions,
+            'total_audit_entries': self._total_audit_entries,
+            'recent_audit_entries': self._windows['audit_log'].totals.get('all', 0),
+            'recent_alerts': {detector: detections[detector] for detector in DETECTORS if detections.get(detector)},
+            'refreshed_at': now
+        }
+        with self._lock:
+            self._snapshot = snapshot
+            self.refreshes += 1
+        return snapshot
+
+    def get(self):
+        """The latest counters (refreshed synchronously only if the service has not run yet)"""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return dict(snapshot, recent_alerts=dict(snapshot['recent_alerts']))
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing status snapshot: {e}")
+            self._stop_event.wait(self.interval)
+
+    def stop(self, timeout=5.0):
+        """Stop refreshing and wait for the current refresh to finish"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_status_snapshot():
+    """Return the process-wide status snapshot service, starting it on first use"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                service = StatusSnapshot()
+                service.start()
+                _service = service
+    return _service